@@ -0,0 +1,39 @@
+"""Compare the legacy librosa preprocessing path with the single-buffer engine.
+
+Reports milliseconds per minute of audio and peak traced memory. Run from the repository root:
+    python -m backend.benchmarks.audio_preprocessing backend/uploads/test.wav backend/uploads/test.mp3
+"""
+import argparse
+import time
+import tracemalloc
+from ..utils.audio_processing import AudioProcessor
+
+def _measure(fn, path: str, repeat: int):
+    """Best-of-repeat wall time and peak traced allocation for one preprocessing call."""
+    best = float("inf")
+    peak = 0
+    for _ in range(repeat):
+        tracemalloc.start()
+        start = time.perf_counter()
+        fn(path)
+        best = min(best, time.perf_counter() - start)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return best, peak
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("paths", nargs="+")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    engines = (("legacy", AudioProcessor.process_audio_legacy), ("fast", AudioProcessor.process_audio_fast))
+    print(f"{'file':<32}{'engine':<8}{'ms/audio-min':>14}{'peak MB':>10}")
+    for path in args.paths:
+        minutes = AudioProcessor.get_duration(path) / 60
+        for name, fn in engines:
+            seconds, peak = _measure(fn, path, args.repeat)
+            print(f"{path[-32:]:<32}{name:<8}{seconds * 1000 / minutes:>14.1f}{peak / 2 ** 20:>10.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Serve an OpenAI-compatible chat completions endpoint with scripted latency.
+
+Point the app at it to exercise /api/query and /api/query/stream without an API key:
+    python -m backend.benchmarks.fake_completion_server --port 8001
+    OPENAI_API_BASE=http://127.0.0.1:8001/v1 OPENAI_API_KEY=fake python -m backend.main
+"""
+import argparse
+import json
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_ANSWER = (
+    "Based on the notes, the team agreed to delay the dashboard launch until the "
+    "database migration finishes, and the engineering lead owns the revised timeline."
+)
+
+def make_handler(answer: str, first_token_delay: float, token_delay: float):
+    """Request handler class answering every completion with the same text."""
+    tokens = [word + " " for word in answer.split()]
+
+    class CompletionHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _chunk(self, delta: dict, finish_reason=None) -> bytes:
+            body = {
+                "id": "chatcmpl-fake",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": "fake",
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+            }
+            return f"data: {json.dumps(body)}\n\n".encode()
+
+        def _write_chunked(self, data: bytes):
+            self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+            self.wfile.flush()
+
+        def do_POST(self):
+            if not self.path.endswith("/chat/completions"):
+                self.send_error(404)
+                return
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            max_tokens = request.get("max_tokens") or len(tokens)
+            reply = tokens[:max_tokens]
+
+            time.sleep(first_token_delay)
+            if not request.get("stream"):
+                time.sleep(token_delay * max(len(reply) - 1, 0))
+                body = json.dumps({
+                    "id": "chatcmpl-fake",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": "fake",
+                    "choices": [{
+                        "index": 0,
+                        "message": {"role": "assistant", "content": "".join(reply).strip()},
+                        "finish_reason": "stop"
+                    }],
+                    "usage": {"prompt_tokens": 0, "completion_tokens": len(reply), "total_tokens": len(reply)}
+                }).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            self._write_chunked(self._chunk({"role": "assistant"}))
+            for i, token in enumerate(reply):
+                if i:
+                    time.sleep(token_delay)
+                self._write_chunked(self._chunk({"content": token}))
+            self._write_chunked(self._chunk({}, finish_reason="stop"))
+            self._write_chunked(b"data: [DONE]\n\n")
+            self._write_chunked(b"")
+
+        def log_message(self, format, *args):
+            pass
+
+    return CompletionHandler
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--first-token-delay", type=float, default=0.4, help="Seconds before the first token")
+    parser.add_argument("--token-delay", type=float, default=0.03, help="Seconds between later tokens")
+    parser.add_argument("--answer", default=DEFAULT_ANSWER)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(
+        (args.host, args.port),
+        make_handler(args.answer, args.first_token_delay, args.token_delay)
+    )
+    print(f"Fake completion server on http://{args.host}:{args.port}/v1")
+    server.serve_forever()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Compare retrieval quality and latency of dense, lexical (FTS5 BM25) and hybrid (RRF) search.
+
+The corpus is a fixed set of synthetic meeting notes. Half the queries name exact
+identifiers (ticket numbers, codenames, amounts); the rest paraphrase the note.
+
+Run from the repository root:
+    python -m backend.benchmarks.hybrid_retrieval --notes 2000 --k 5
+"""
+import argparse
+import os
+import tempfile
+import time
+import faiss
+import numpy as np
+from sentence_transformers import SentenceTransformer
+from ..models.rag_database import connect, init_schema, lexical_search, reciprocal_rank_fusion
+from ..utils.config import EMBEDDING_MODEL, HYBRID_CANDIDATES
+
+TOPICS = ["billing", "onboarding", "search", "mobile", "payments", "reporting", "security", "infrastructure"]
+CODENAMES = ["Atlas", "Borealis", "Cobalt", "Dynamo", "Ember", "Falcon", "Granite", "Helix", "Ion", "Juniper"]
+OWNERS = ["Priya", "Marcus", "Elena", "Tomasz", "Aiko", "Daniel", "Fatima", "Lucas"]
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
+
+def build_corpus(num_notes: int, seed: int = 0):
+    """Synthetic notes plus (query, kind, relevant note index) triples."""
+    rng = np.random.default_rng(seed)
+    notes = []
+    queries = []
+    for i in range(num_notes):
+        topic = TOPICS[rng.integers(len(TOPICS))]
+        codename = f"{CODENAMES[rng.integers(len(CODENAMES))]}-{i}"
+        owner = OWNERS[rng.integers(len(OWNERS))]
+        ticket = f"INC-{4000 + i}"
+        amount = int(rng.integers(10, 500))
+        notes.append(
+            f"During the {topic} sync, {owner} reported that incident {ticket} delayed the {codename} rollout. "
+            f"The team agreed to move ${amount}k from the {TOPICS[(i + 3) % len(TOPICS)]} budget "
+            f"and revisit the plan on {DAYS[i % len(DAYS)]}."
+        )
+        if i % 2:
+            queries.append((f"What happened with {ticket}?", "exact", i))
+        else:
+            queries.append((
+                f"Which {topic} meeting had {owner} flag a launch slip and shift {amount} thousand dollars?",
+                "paraphrase",
+                i
+            ))
+    return notes, queries
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--notes", type=int, default=2000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    args = parser.parse_args()
+
+    notes, queries = build_corpus(args.notes)
+    rng = np.random.default_rng(1)
+    queries = [queries[i] for i in rng.choice(len(queries), min(args.queries, len(queries)), replace=False)]
+
+    model = SentenceTransformer(EMBEDDING_MODEL)
+    vectors = np.ascontiguousarray(model.encode(notes, batch_size=64), dtype=np.float32)
+    index = faiss.IndexFlatL2(vectors.shape[1])
+    index.add(vectors)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = connect(os.path.join(tmp, "bench.db"))
+        init_schema(conn)
+        conn.executemany("INSERT INTO notes (title, content) VALUES (?, ?)", ((f"note {i}", n) for i, n in enumerate(notes)))
+        conn.executemany(
+            "INSERT INTO chunks (note_id, content, embedding_id) VALUES (?, ?, ?)",
+            ((i + 1, n, i) for i, n in enumerate(notes))
+        )
+        conn.commit()
+
+        candidates = max(args.k, HYBRID_CANDIDATES)
+
+        def dense(query, k):
+            _, found = index.search(model.encode([query]).astype(np.float32), k)
+            return [int(i) for i in found[0] if i >= 0]
+
+        def lexical(query, k):
+            return [i for i, _ in lexical_search(conn, query, k)]
+
+        def hybrid(query, k):
+            return [i for i, _ in reciprocal_rank_fusion([dense(query, candidates), lexical(query, candidates)], k)]
+
+        print(f"{'mode':<10}{'kind':<12}{f'recall@{args.k}':>10}{'MRR':>8}{'ms':>8}")
+        for label, search in (("dense", dense), ("lexical", lexical), ("hybrid", hybrid)):
+            stats = {}
+            for query, kind, relevant in queries:
+                start = time.perf_counter()
+                found = search(query, args.k)
+                elapsed = (time.perf_counter() - start) * 1000
+                rank = found.index(relevant) + 1 if relevant in found else None
+                for group in (kind, "all"):
+                    entry = stats.setdefault(group, {"hits": 0, "rr": 0.0, "ms": 0.0, "n": 0})
+                    entry["hits"] += rank is not None
+                    entry["rr"] += 1.0 / rank if rank else 0.0
+                    entry["ms"] += elapsed
+                    entry["n"] += 1
+            for group in ("exact", "paraphrase", "all"):
+                entry = stats[group]
+                print(f"{label:<10}{group:<12}{entry['hits'] / entry['n']:>10.2f}"
+                      f"{entry['rr'] / entry['n']:>8.3f}{entry['ms'] / entry['n']:>8.2f}")
+
+if __name__ == "__main__":
+    main()
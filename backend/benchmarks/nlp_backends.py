@@ -0,0 +1,123 @@
+"""Compare accuracy and latency of the NLP pipelines across inference backends.
+
+Sentiment is scored against fixed labels; zero-shot topics and summaries are scored
+by agreement with the full-precision torch backend.
+
+Run from the repository root:
+    python -m backend.benchmarks.nlp_backends --backends torch int8 onnx
+"""
+import argparse
+import time
+import numpy as np
+from ..models.nlp_backends import NLP_BACKENDS, build_pipeline
+from ..models.nlp_processing import TOPIC_CATEGORIES
+from ..utils.config import SUMMARIZER_MODEL, CLASSIFIER_MODEL, SENTIMENT_MODEL
+
+SENTIMENT_SAMPLES = [
+    ("The launch went smoothly and customers love the new dashboard.", "POSITIVE"),
+    ("We missed the deadline again and the client is furious.", "NEGATIVE"),
+    ("Great progress this sprint, every action item was closed.", "POSITIVE"),
+    ("The migration failed twice and we lost a day of data.", "NEGATIVE"),
+    ("Hiring is ahead of plan and the new engineers are excellent.", "POSITIVE"),
+    ("Latency regressed badly after the release and nobody owns it.", "NEGATIVE"),
+    ("The budget review was productive and everyone agreed on priorities.", "POSITIVE"),
+    ("Support tickets doubled and the backlog keeps growing.", "NEGATIVE"),
+]
+
+TOPIC_SAMPLES = [
+    "The new GPU cluster cut model training time in half and the compiler team shipped a faster runtime.",
+    "Quarterly revenue beat forecasts and the board approved the acquisition of a smaller competitor.",
+    "The clinic trial showed the vaccine reduced hospital admissions among older patients.",
+    "Teachers asked for smaller classes and more funding for the after-school reading program.",
+    "The city council voted to ban single-use plastics and expand the recycling scheme.",
+    "The striker scored twice in the final and the club lifted its first trophy in a decade.",
+]
+
+SUMMARY_SAMPLES = [
+    " ".join([
+        "The team met to review the quarterly roadmap.",
+        "Engineering reported that the database migration is two weeks behind schedule because of unexpected schema conflicts.",
+        "Product proposed moving the customer dashboard launch to next month so the migration can finish first.",
+        "Finance confirmed the budget can absorb the delay but asked for a revised timeline by Friday.",
+        "Everyone agreed that the hiring plan stays unchanged and that two new engineers will join the migration effort.",
+        "Action items were assigned to the engineering lead and the product manager, with a follow up next week.",
+    ]),
+    " ".join([
+        "Customer feedback from the beta was mostly positive, especially about search speed.",
+        "Several users reported confusing navigation in the settings page and missing export options.",
+        "Design will prototype a simplified settings layout and test it with five customers.",
+        "Support noted that ticket volume rose after the last release, mainly about login errors.",
+        "The release manager will add a rollback checklist and schedule a retrospective on the login incident.",
+    ]),
+]
+
+def _timed(fn, inputs):
+    """Run fn over each input one at a time, as the request path does."""
+    outputs = []
+    latencies = []
+    for item in inputs:
+        start = time.perf_counter()
+        outputs.append(fn(item))
+        latencies.append((time.perf_counter() - start) * 1000)
+    return outputs, float(np.mean(latencies))
+
+def _token_f1(candidate: str, reference: str) -> float:
+    """Unigram overlap F1 between two summaries."""
+    candidate_tokens = candidate.lower().split()
+    reference_tokens = reference.lower().split()
+    common = sum(min(candidate_tokens.count(t), reference_tokens.count(t)) for t in set(candidate_tokens))
+    if not common:
+        return 0.0
+    precision = common / len(candidate_tokens)
+    recall = common / len(reference_tokens)
+    return 2 * precision * recall / (precision + recall)
+
+def run_backend(backend: str) -> dict:
+    """Latency and raw outputs of each pipeline on one backend."""
+    sentiment = build_pipeline("sentiment-analysis", SENTIMENT_MODEL, backend)
+    classifier = build_pipeline("zero-shot-classification", CLASSIFIER_MODEL, backend)
+    summarizer = build_pipeline("summarization", SUMMARIZER_MODEL, backend)
+
+    # Warm up so graph initialisation is not counted as latency
+    sentiment(SENTIMENT_SAMPLES[0][0])
+    classifier(TOPIC_SAMPLES[0], TOPIC_CATEGORIES, multi_label=True)
+    summarizer(SUMMARY_SAMPLES[0], max_length=60, min_length=20, do_sample=False)
+
+    labels, sentiment_ms = _timed(lambda t: sentiment(t, truncation=True)[0]["label"],
+                                  [text for text, _ in SENTIMENT_SAMPLES])
+    topics, topic_ms = _timed(lambda t: classifier(t, TOPIC_CATEGORIES, multi_label=True)["labels"][0],
+                              TOPIC_SAMPLES)
+    summaries, summary_ms = _timed(
+        lambda t: summarizer(t, max_length=60, min_length=20, do_sample=False)[0]["summary_text"],
+        SUMMARY_SAMPLES
+    )
+    return {
+        "sentiment_accuracy": float(np.mean([l == g for l, (_, g) in zip(labels, SENTIMENT_SAMPLES)])),
+        "sentiment_ms": sentiment_ms,
+        "topics": topics,
+        "topic_ms": topic_ms,
+        "summaries": summaries,
+        "summary_ms": summary_ms
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backends", nargs="+", choices=NLP_BACKENDS, default=list(NLP_BACKENDS))
+    args = parser.parse_args()
+
+    # The torch backend is the reference the others are compared against
+    backends = ["torch"] + [b for b in args.backends if b != "torch"]
+    results = {backend: run_backend(backend) for backend in backends}
+    reference = results["torch"]
+
+    print(f"{'backend':<8}{'sent acc':>10}{'sent ms':>10}{'topic agr':>11}{'topic ms':>10}"
+          f"{'summ F1':>10}{'summ ms':>10}")
+    for backend in backends:
+        r = results[backend]
+        topic_agreement = np.mean([a == b for a, b in zip(r["topics"], reference["topics"])])
+        summary_f1 = np.mean([_token_f1(a, b) for a, b in zip(r["summaries"], reference["summaries"])])
+        print(f"{backend:<8}{r['sentiment_accuracy']:>10.2f}{r['sentiment_ms']:>10.1f}"
+              f"{topic_agreement:>11.2f}{r['topic_ms']:>10.1f}{summary_f1:>10.2f}{r['summary_ms']:>10.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Compare time to first token of /api/query/stream with the latency of /api/query.
+
+Run against a running app, e.g. one backed by the fake completion server:
+    python -m backend.benchmarks.query_stream --url http://127.0.0.1:5000 --repeat 10
+"""
+import argparse
+import json
+import time
+import urllib.request
+import numpy as np
+
+DEFAULT_QUERIES = [
+    "What did the team decide about the launch?",
+    "Who owns the migration timeline?",
+    "What were the action items from the last meeting?",
+]
+
+def _post(url: str, body: dict):
+    request = urllib.request.Request(
+        url,
+        data=json.dumps(body).encode(),
+        headers={"Content-Type": "application/json"}
+    )
+    return urllib.request.urlopen(request)
+
+def time_blocking(url: str, query: str) -> float:
+    """Milliseconds until the full JSON answer arrives."""
+    start = time.perf_counter()
+    with _post(f"{url}/api/query", {"query": query}) as response:
+        response.read()
+    return (time.perf_counter() - start) * 1000
+
+def time_stream(url: str, query: str) -> dict:
+    """Milliseconds until the sources, the first token and the end of the stream arrive."""
+    start = time.perf_counter()
+    timings = {}
+    with _post(f"{url}/api/query/stream", {"query": query}) as response:
+        for line in response:
+            if not line.startswith(b"event: "):
+                continue
+            event = line[len(b"event: "):].strip().decode()
+            elapsed = (time.perf_counter() - start) * 1000
+            if event == "sources":
+                timings["sources_ms"] = elapsed
+            elif event == "token":
+                timings.setdefault("first_token_ms", elapsed)
+            elif event == "error":
+                raise RuntimeError("Stream returned an error event")
+    timings["total_ms"] = (time.perf_counter() - start) * 1000
+    return timings
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://127.0.0.1:5000")
+    parser.add_argument("--queries", nargs="+", default=DEFAULT_QUERIES)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    queries = args.queries * args.repeat
+    time_blocking(args.url, queries[0])  # Warm-up
+
+    blocking = np.array([time_blocking(args.url, q) for q in queries])
+    streamed = [time_stream(args.url, q) for q in queries]
+
+    def row(label, values):
+        values = np.array(values)
+        print(f"{label:<22}{values.mean():>10.0f}{np.percentile(values, 50):>10.0f}{np.percentile(values, 95):>10.0f}")
+
+    print(f"{'ms':<22}{'mean':>10}{'p50':>10}{'p95':>10}")
+    row("query total", blocking)
+    row("stream sources", [s["sources_ms"] for s in streamed])
+    row("stream first token", [s["first_token_ms"] for s in streamed if "first_token_ms" in s])
+    row("stream total", [s["total_ms"] for s in streamed])
+
+if __name__ == "__main__":
+    main()
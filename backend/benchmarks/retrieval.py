@@ -0,0 +1,74 @@
+"""Compare chunk lookup latency: per-hit queries without indexes vs one batched, indexed query.
+
+Run from the repository root:
+    python -m backend.benchmarks.retrieval --chunks 1000 10000 100000 --k 10
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+import numpy as np
+from ..models.rag_database import connect, init_schema, fetch_chunks
+
+def _populate(conn: sqlite3.Connection, num_chunks: int, chunks_per_note: int = 20):
+    """Insert synthetic notes and chunks with sequential embedding ids."""
+    num_notes = max(1, num_chunks // chunks_per_note)
+    conn.executemany(
+        "INSERT INTO notes (title, content) VALUES (?, ?)",
+        ((f"note {i}", "content") for i in range(num_notes))
+    )
+    conn.executemany(
+        "INSERT INTO chunks (note_id, content, embedding_id) VALUES (?, ?, ?)",
+        ((i // chunks_per_note + 1, f"chunk {i} " * 50, i) for i in range(num_chunks))
+    )
+    conn.commit()
+
+def _time_ms(fn, queries) -> float:
+    start = time.perf_counter()
+    for ids in queries:
+        fn(ids)
+    return (time.perf_counter() - start) * 1000 / len(queries)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunks", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'chunks':>10}{'per-hit ms':>14}{'batched ms':>14}{'speedup':>10}")
+    for num_chunks in args.chunks:
+        with tempfile.TemporaryDirectory() as tmp:
+            conn = connect(os.path.join(tmp, "bench.db"))
+            init_schema(conn)
+            _populate(conn, num_chunks)
+            queries = [rng.choice(num_chunks, args.k, replace=False) for _ in range(args.queries)]
+
+            # Previous behaviour: no indexes, one query per FAISS hit
+            conn.execute("DROP INDEX idx_chunks_embedding_id")
+            conn.execute("DROP INDEX idx_chunks_note_id")
+
+            def per_hit(ids):
+                for idx in ids:
+                    conn.execute(
+                        """
+                        SELECT c.*, n.title, n.audio_path
+                        FROM chunks c
+                        JOIN notes n ON c.note_id = n.id
+                        WHERE c.embedding_id = ?
+                        """,
+                        (int(idx),)
+                    ).fetchone()
+
+            legacy_ms = _time_ms(per_hit, queries)
+
+            init_schema(conn)
+            batched_ms = _time_ms(lambda ids: fetch_chunks(conn, ids), queries)
+            conn.close()
+
+        print(f"{num_chunks:>10}{legacy_ms:>14.3f}{batched_ms:>14.3f}{legacy_ms / batched_ms:>9.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""Measure map-reduce summarization latency and throughput on long synthetic transcripts.
+
+Run from the repository root:
+    python -m backend.benchmarks.summarization --words 10000 50000 100000
+"""
+import argparse
+import time
+import numpy as np
+from ..models.registry import registry
+
+_VOCABULARY = (
+    "the team reviewed quarterly revenue budget roadmap launch customer feedback "
+    "engineering hiring plan risk timeline migration database latency release "
+    "agreed decided owner action item follow up next week meeting notes"
+).split()
+
+def synthetic_transcript(num_words: int, seed: int = 0) -> str:
+    """Meeting-like text with sentences of 8-20 words."""
+    rng = np.random.default_rng(seed)
+    sentences = []
+    written = 0
+    while written < num_words:
+        length = int(rng.integers(8, 21))
+        words = rng.choice(_VOCABULARY, length)
+        sentences.append(" ".join(words).capitalize() + ".")
+        written += length
+    return " ".join(sentences)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--words", type=int, nargs="+", default=[10000, 50000, 100000])
+    args = parser.parse_args()
+
+    processor = registry.get("nlp_processor")
+    processor.summarize_text(synthetic_transcript(200))  # Warm-up
+
+    print(f"{'words':>8}{'chunks':>8}{'seconds':>10}{'words/sec':>12}")
+    for num_words in args.words:
+        text = synthetic_transcript(num_words)
+        chunks = len(processor._token_chunks(text))
+        start = time.perf_counter()
+        processor.summarize_text(text)
+        elapsed = time.perf_counter() - start
+        print(f"{num_words:>8}{chunks:>8}{elapsed:>10.1f}{num_words / elapsed:>12.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""Compare recall and latency of the supported FAISS index types.
+
+Run from the repository root:
+    python -m backend.benchmarks.vector_index --vectors 100000 --queries 200
+"""
+import argparse
+import time
+import numpy as np
+from ..models.vector_index import INDEX_TYPES, build_index, evaluate_index, min_training_vectors
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--vectors", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--types", nargs="+", default=list(INDEX_TYPES), choices=INDEX_TYPES)
+    args = parser.parse_args()
+
+    # Random unit vectors stand in for sentence embeddings
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((args.vectors, args.dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    queries = vectors[rng.choice(args.vectors, args.queries, replace=False)]
+    queries = queries + 0.05 * rng.standard_normal(queries.shape).astype(np.float32)
+
+    print(f"{'type':<8}{'build s':>10}{'recall@k':>10}{'mean ms':>10}{'p99 ms':>10}")
+    for index_type in args.types:
+        if args.vectors < min_training_vectors(index_type):
+            print(f"{index_type:<8}  skipped: needs {min_training_vectors(index_type)} vectors")
+            continue
+        start = time.perf_counter()
+        index = build_index(vectors, index_type)
+        build_time = time.perf_counter() - start
+        report = evaluate_index(index, vectors, queries, k=args.k)
+        print(f"{index_type:<8}{build_time:>10.2f}{report['recall_at_k']:>10.3f}"
+              f"{report['latency_ms_mean']:>10.3f}{report['latency_ms_p99']:>10.3f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+"""Compare files/min of batched Whisper decoding against the per-file loop.
+
+Run from the repository root:
+    python -m backend.benchmarks.whisper_batch path/to/a.wav path/to/b.mp3 --repeat 4
+"""
+import argparse
+import time
+from ..models.whisper_model import WhisperTranscriber
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("paths", nargs="+", help="Audio files forming the corpus")
+    parser.add_argument("--repeat", type=int, default=1, help="Repeat the corpus to build a larger batch")
+    parser.add_argument("--language", default="en")
+    args = parser.parse_args()
+
+    transcriber = WhisperTranscriber()
+    corpus = args.paths * args.repeat
+
+    # Warm up so model initialisation is not attributed to either path; the result
+    # cache is bypassed throughout so repeated files are really decoded
+    transcriber.transcribe_batch(args.paths[:1], batched=False, use_cache=False, language=args.language)
+
+    for label, batched in (("loop", False), ("batched", True)):
+        start = time.perf_counter()
+        results = transcriber.transcribe_batch(corpus, batched=batched, use_cache=False, language=args.language)
+        elapsed = time.perf_counter() - start
+        failed = sum(1 for r in results if not r["success"])
+        print(f"{label:<8} {len(corpus)} files in {elapsed:.1f}s = {len(corpus) / elapsed * 60:.1f} files/min"
+              f"{f' ({failed} failed)' if failed else ''}")
+
+if __name__ == "__main__":
+    main()
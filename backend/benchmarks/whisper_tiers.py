@@ -0,0 +1,65 @@
+"""Measure the real-time factor of each Whisper quality tier, in fp32 and int8.
+
+RTF is processing seconds per second of audio; below 1.0 is faster than real time.
+Transcripts are compared by word overlap with the most accurate tier in fp32.
+
+Run from the repository root:
+    python -m backend.benchmarks.whisper_tiers path/to/a.wav path/to/b.mp3 --int8
+"""
+import argparse
+import time
+from ..models.whisper_model import WhisperTranscriber
+from ..utils.config import WHISPER_QUALITY_TIERS
+
+def _word_overlap(candidate: str, reference: str) -> float:
+    """Fraction of reference words also present in the candidate, by count."""
+    candidate_words = candidate.lower().split()
+    reference_words = reference.lower().split()
+    if not reference_words:
+        return 1.0
+    common = sum(min(candidate_words.count(w), reference_words.count(w)) for w in set(reference_words))
+    return common / len(reference_words)
+
+def run_tier(transcriber: WhisperTranscriber, quality: str, paths: list, language: str) -> dict:
+    """Transcribe the corpus with one tier, bypassing the result cache."""
+    # Load and warm up the model so neither is counted as processing time
+    transcriber._transcribe_uncached(paths[0], language=language, quality=quality)
+
+    texts = []
+    audio_seconds = 0.0
+    start = time.perf_counter()
+    for path in paths:
+        result = transcriber._transcribe_uncached(path, language=language, quality=quality)
+        texts.append(result["text"])
+        audio_seconds += result["duration"]
+    elapsed = time.perf_counter() - start
+    return {"texts": texts, "audio_seconds": audio_seconds, "seconds": elapsed}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("paths", nargs="+", help="Audio files forming the corpus")
+    parser.add_argument("--tiers", nargs="+", choices=list(WHISPER_QUALITY_TIERS), default=list(WHISPER_QUALITY_TIERS))
+    parser.add_argument("--int8", action="store_true", help="Also run each tier with int8 CPU inference")
+    parser.add_argument("--language", default="en")
+    args = parser.parse_args()
+
+    modes = [("fp32", WhisperTranscriber(int8=False))]
+    if args.int8:
+        modes.append(("int8", WhisperTranscriber(int8=True)))
+
+    results = {}
+    for mode, transcriber in modes:
+        for quality in args.tiers:
+            results[(quality, mode)] = run_tier(transcriber, quality, args.paths, args.language)
+
+    # The most accurate requested tier in fp32 is the reference transcript
+    reference = results[(args.tiers[-1], "fp32")]["texts"]
+
+    print(f"{'tier':<10}{'model':<10}{'mode':<6}{'audio s':>9}{'seconds':>9}{'RTF':>7}{'overlap':>9}")
+    for (quality, mode), r in results.items():
+        overlap = sum(_word_overlap(t, ref) for t, ref in zip(r["texts"], reference)) / len(reference)
+        print(f"{quality:<10}{WHISPER_QUALITY_TIERS[quality]:<10}{mode:<6}{r['audio_seconds']:>9.1f}"
+              f"{r['seconds']:>9.1f}{r['seconds'] / r['audio_seconds']:>7.3f}{overlap:>9.2f}")
+
+if __name__ == "__main__":
+    main()
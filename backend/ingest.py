@@ -0,0 +1,49 @@
+"""Bulk-ingest historical notes into the RAG database.
+
+Reads one JSON object per line ({"content": ..., "title": ..., "segments": [...], "tags": [...]})
+from a file or stdin. Run from the repository root:
+    python -m backend.ingest notes.jsonl --workers 4
+"""
+import argparse
+import json
+import sys
+from .models.registry import registry
+from .utils.config import INGEST_BATCH_CHUNKS
+
+def read_notes(stream):
+    """Yield notes from a JSON-lines stream without loading it all into memory."""
+    for line_number, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line:
+            continue
+        note = json.loads(line)
+        if not note.get("content"):
+            print(f"Skipping line {line_number}: no content", file=sys.stderr)
+            continue
+        yield note
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path", help="JSON-lines file, or - for stdin")
+    parser.add_argument("--batch-size", type=int, default=INGEST_BATCH_CHUNKS, help="Chunks per encode/write batch")
+    parser.add_argument("--workers", type=int, default=1, help="Encoding processes")
+    args = parser.parse_args()
+
+    def report(stats):
+        print(f"{len(stats['note_ids'])} notes, {stats['chunks']} chunks, "
+              f"{stats['chunks_per_sec']:.1f} chunks/sec", file=sys.stderr)
+
+    db = registry.get("rag_database")
+    stream = sys.stdin if args.path == "-" else open(args.path, encoding="utf-8")
+    try:
+        stats = db.add_notes(read_notes(stream), batch_size=args.batch_size, workers=args.workers, progress=report)
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+    # Flush everything ingested into a snapshot before exiting
+    db.compact_index()
+    print(json.dumps({k: v for k, v in stats.items() if k != "note_ids"}))
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,8 @@
-from flask import Flask
+from flask import Flask, request, jsonify
 from flask_cors import CORS
 import os
-from .utils.config import config, Config
+from .utils.config import config, Config, WARMUP_MODELS
+from .models.registry import registry
 from .routes.transcribe import transcribe_bp
 from .routes.summarize import summarize_bp
 from .routes.query import query_bp
@@ -32,6 +33,29 @@ def create_app(config_name="default"):
         """Basic health check endpoint."""
         return {'status': 'healthy'}
     
+    @app.route('/models')
+    def model_stats():
+        """Load state, load time and memory of each shared model."""
+        return jsonify(registry.stats())
+    
+    @app.route('/models/warmup', methods=['POST'])
+    def warm_up_models():
+        """Load the requested models (or all) ahead of the first request."""
+        try:
+            data = request.get_json(silent=True) or {}
+            return jsonify({
+                'success': True,
+                'models': registry.warm_up(data.get('models'))
+            })
+        except Exception as e:
+            return jsonify({
+                'error': str(e)
+            }), 500
+    
+    # Load configured models before serving traffic
+    if WARMUP_MODELS:
+        registry.warm_up(WARMUP_MODELS)
+    
     return app
 
 def main():
@@ -0,0 +1,87 @@
+from typing import Dict, Iterable, Optional
+from collections import OrderedDict
+import copy
+import json
+import threading
+import time
+import numpy as np
+
+class AnswerCache:
+    """In-memory LRU of LLM answers, matched on query-embedding similarity over the same retrieved chunks."""
+
+    def __init__(self, threshold: float = 0.95, max_entries: int = 1000, ttl: float = 3600):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        # entry id -> (context key, unit query vector, result, expires at)
+        self._entries = OrderedDict()
+        self._by_context = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def context_key(chunk_ids: Iterable[int], options: Dict) -> str:
+        """Key for the retrieved chunk set and generation options; new or changed chunks change it."""
+        return json.dumps({"chunks": sorted(int(i) for i in chunk_ids), **options}, sort_keys=True)
+
+    @staticmethod
+    def _unit(embedding: np.ndarray) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32).ravel()
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _drop(self, entry_id: int):
+        context, _, _, _ = self._entries.pop(entry_id)
+        ids = self._by_context[context]
+        ids.discard(entry_id)
+        if not ids:
+            del self._by_context[context]
+
+    def get(self, embedding: np.ndarray, context: str) -> Optional[Dict]:
+        """Cached answer for the most similar earlier query over the same context, if close enough."""
+        if self.max_entries <= 0:
+            return None
+        query = self._unit(embedding)
+        now = time.time()
+
+        with self._lock:
+            best_id, best_score = None, self.threshold
+            for entry_id in list(self._by_context.get(context, ())):
+                _, vector, _, expires_at = self._entries[entry_id]
+                if expires_at < now:
+                    self._drop(entry_id)
+                    continue
+                score = float(vector @ query)
+                if score >= best_score:
+                    best_id, best_score = entry_id, score
+
+            if best_id is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(best_id)
+            return copy.deepcopy(self._entries[best_id][2])
+
+    def put(self, embedding: np.ndarray, context: str, result: Dict):
+        """Store an answer, evicting the least recently used entries beyond max_entries."""
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = (context, self._unit(embedding), copy.deepcopy(result), time.time() + self.ttl)
+            self._by_context.setdefault(context, set()).add(entry_id)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
@@ -0,0 +1,80 @@
+from typing import Dict, List, Optional, Tuple
+import re
+
+_WORD = re.compile(r"\S+")
+
+def chunk_spans(text: str, chunk_size: int, overlap: int) -> List[Tuple[str, int, int]]:
+    """Split text into overlapping word chunks, keeping each chunk's character span."""
+    words = [(m.group(), m.start(), m.end()) for m in _WORD.finditer(text)]
+    spans = []
+    for i in range(0, len(words), chunk_size - overlap):
+        window = words[i:i + chunk_size]
+        spans.append((" ".join(w[0] for w in window), window[0][1], window[-1][2]))
+    return spans
+
+def attach_offsets(segments: List[Dict], text: str) -> str:
+    """
+    Record each segment's char_start/char_end within Whisper's transcript text and return it.
+
+    The text is kept as Whisper produced it, since only languages written with spaces
+    have one between segments. Segments are located in order within a bounded window;
+    any that can't be found get no offsets.
+    """
+    cursor = 0
+    for segment in segments:
+        segment_text = segment["text"]
+        if not segment_text:
+            continue
+        start = text.find(segment_text, cursor, cursor + 2 * len(segment_text) + 256)
+        if start < 0:
+            continue
+        segment["char_start"] = start
+        segment["char_end"] = start + len(segment_text)
+        cursor = segment["char_end"]
+    return text
+
+def segment_intervals(text: str, segments: List[Dict]) -> List[Tuple[int, int, float, float]]:
+    """
+    Map segments to (char_start, char_end, start_time, end_time) intervals within text.
+    
+    Uses offsets recorded by attach_offsets when present; otherwise locates each segment
+    after the previous one within a bounded window, so alignment stays linear.
+    """
+    intervals = []
+    cursor = 0
+    for segment in segments:
+        if "char_start" in segment and "char_end" in segment:
+            start, end = segment["char_start"], segment["char_end"]
+        else:
+            segment_text = segment["text"].strip()
+            if not segment_text:
+                continue
+            start = text.find(segment_text, cursor, cursor + 2 * len(segment_text) + 256)
+            if start < 0:
+                continue
+            end = start + len(segment_text)
+        intervals.append((start, end, segment["start"], segment["end"]))
+        cursor = end
+    return intervals
+
+def chunk_times(spans: List[Tuple[str, int, int]],
+                intervals: List[Tuple[int, int, float, float]]) -> List[Tuple[Optional[float], Optional[float]]]:
+    """
+    Start/end time of each chunk from the segments overlapping its character span.
+    
+    Chunks and intervals are both ordered by offset, so a single forward sweep suffices.
+    """
+    times = []
+    first = 0
+    for _, char_start, char_end in spans:
+        # Skip segments ending before this chunk; later chunks start no earlier
+        while first < len(intervals) and intervals[first][1] <= char_start:
+            first += 1
+        last = first
+        while last + 1 < len(intervals) and intervals[last + 1][0] < char_end:
+            last += 1
+        if first < len(intervals) and intervals[first][0] < char_end:
+            times.append((intervals[first][2], intervals[last][3]))
+        else:
+            times.append((None, None))
+    return times
@@ -0,0 +1,128 @@
+from typing import Dict, List, Optional, Tuple
+import re
+from ..utils.tokens import count_tokens
+
+# Partial blocks smaller than this are not worth the prompt space
+MIN_TRIMMED_TOKENS = 32
+
+_SENTENCE_END = re.compile(r"[.!?]$")
+
+def _word_overlap(first: List[str], second: List[str]) -> int:
+    """Length of the longest suffix of first that is also a prefix of second."""
+    if not second:
+        return 0
+    for start in range(max(0, len(first) - len(second)), len(first)):
+        if first[start] == second[0] and first[start:] == second[:len(first) - start]:
+            return len(first) - start
+    return 0
+
+def _earliest(a: Optional[float], b: Optional[float]) -> Optional[float]:
+    return b if a is None else a if b is None else min(a, b)
+
+def _latest(a: Optional[float], b: Optional[float]) -> Optional[float]:
+    return b if a is None else a if b is None else max(a, b)
+
+def merge_chunks(chunks: List[Dict]) -> List[Dict]:
+    """
+    Merge overlapping or touching chunks of the same note into single blocks.
+
+    Overlapping words are kept once. Blocks are ordered by their best-ranked chunk
+    and list every merged chunk in chunk_ids. Chunks without character offsets pass
+    through unchanged.
+    """
+    blocks = []
+    by_note = {}
+    for rank, chunk in enumerate(chunks):
+        if chunk.get("char_start") is None or chunk.get("char_end") is None:
+            blocks.append((rank, {**chunk, "chunk_ids": [chunk["embedding_id"]]}))
+        else:
+            by_note.setdefault(chunk["note_id"], []).append((rank, chunk))
+
+    for members in by_note.values():
+        members.sort(key=lambda member: member[1]["char_start"])
+        block_rank, block = None, None
+        for rank, chunk in members:
+            # Neighbours overlap, or are separated by a single whitespace character
+            if block is None or chunk["char_start"] > block["char_end"] + 1:
+                if block is not None:
+                    blocks.append((block_rank, block))
+                block_rank, block = rank, {**chunk, "chunk_ids": [chunk["embedding_id"]]}
+                continue
+
+            if chunk["char_end"] > block["char_end"]:
+                words = chunk["content"].split()
+                overlap = 0
+                if chunk["char_start"] <= block["char_end"]:
+                    overlap = _word_overlap(block["content"].split(), words)
+                block["content"] = " ".join([block["content"], *words[overlap:]])
+                block["char_end"] = chunk["char_end"]
+            block["chunk_ids"].append(chunk["embedding_id"])
+            block["start_time"] = _earliest(block["start_time"], chunk["start_time"])
+            block["end_time"] = _latest(block["end_time"], chunk["end_time"])
+
+            # The block is identified by, and ranked as, its most relevant chunk
+            if rank < block_rank:
+                block_rank = rank
+                block["embedding_id"] = chunk["embedding_id"]
+                block["score"] = chunk["score"]
+                if "score_source" in chunk:
+                    block["score_source"] = chunk["score_source"]
+                if "rrf_score" in chunk:
+                    block["rrf_score"] = chunk["rrf_score"]
+        blocks.append((block_rank, block))
+
+    blocks.sort(key=lambda block: block[0])
+    return [block for _, block in blocks]
+
+def trim_to_tokens(text: str, budget: int) -> str:
+    """Longest word prefix of text within budget tokens, cut back to a sentence end when one is near."""
+    words = text.split()
+    low, high = 0, len(words)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if count_tokens(" ".join(words[:middle])) <= budget:
+            low = middle
+        else:
+            high = middle - 1
+
+    # Prefer ending on a full sentence if that keeps at least half the words
+    for end in range(low, low // 2, -1):
+        if _SENTENCE_END.search(words[end - 1]):
+            return " ".join(words[:end])
+    return " ".join(words[:low])
+
+def pack_context(chunks: List[Dict], budget: int) -> Tuple[List[Dict], Dict]:
+    """
+    Deduplicate and merge retrieved chunks, then fill the token budget in rank order.
+
+    A block that does not fit is trimmed to the remaining budget. Returns the packed
+    blocks and a report of tokens before and after packing.
+    """
+    tokens_retrieved = sum(count_tokens(chunk["content"]) for chunk in chunks)
+    blocks = merge_chunks(chunks)
+
+    packed = []
+    used = 0
+    trimmed = 0
+    for block in blocks:
+        tokens = count_tokens(block["content"])
+        remaining = budget - used
+        if tokens <= remaining:
+            packed.append(block)
+            used += tokens
+        elif remaining >= MIN_TRIMMED_TOKENS or (not packed and remaining > 0):
+            content = trim_to_tokens(block["content"], remaining)
+            if content:
+                packed.append({**block, "content": content, "trimmed": True})
+                used += count_tokens(content)
+                trimmed += 1
+
+    return packed, {
+        "budget": budget,
+        "tokens_retrieved": tokens_retrieved,
+        "tokens_packed": used,
+        "tokens_saved": tokens_retrieved - used,
+        "chunks_merged": len(chunks) - len(blocks),
+        "blocks_trimmed": trimmed,
+        "blocks_dropped": len(blocks) - len(packed)
+    }
@@ -0,0 +1,129 @@
+from typing import Callable, Dict, List
+from collections import OrderedDict
+import hashlib
+import sqlite3
+import threading
+import time
+import numpy as np
+
+class EmbeddingCache:
+    """Content-addressed embedding cache: in-memory LRU in front of a size-bounded SQLite store."""
+    
+    def __init__(self, path: str, model_name: str, memory_size: int = 10000, max_entries: int = 500000):
+        self.model_name = model_name
+        self.memory_size = memory_size
+        self.max_entries = max_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._inserts_since_evict = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS embeddings (
+                hash TEXT PRIMARY KEY,
+                vector BLOB NOT NULL,
+                last_used REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings (last_used)")
+        self._conn.commit()
+    
+    def _key(self, text: str) -> str:
+        # Keyed on the model too, so switching EMBEDDING_MODEL never serves stale vectors
+        return hashlib.sha256(f"{self.model_name}\0{text}".encode("utf-8")).hexdigest()
+    
+    def _remember(self, key: str, vector: np.ndarray):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+    
+    def encode(self, encode_fn: Callable[[List[str]], np.ndarray], texts: List[str]) -> np.ndarray:
+        """Encode texts with encode_fn, reusing cached vectors for content seen before."""
+        keys = [self._key(text) for text in texts]
+        found = {}
+        
+        with self._lock:
+            # Memory tier
+            for key in keys:
+                if key in self._memory:
+                    found[key] = self._memory[key]
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+            
+            # Disk tier
+            missing = [key for key in dict.fromkeys(keys) if key not in found]
+            if missing:
+                placeholders = ",".join("?" * len(missing))
+                rows = self._conn.execute(
+                    f"SELECT hash, vector FROM embeddings WHERE hash IN ({placeholders})",
+                    missing
+                ).fetchall()
+                for key, blob in rows:
+                    vector = np.frombuffer(blob, dtype=np.float32)
+                    found[key] = vector
+                    self._remember(key, vector)
+                self.disk_hits += len(rows)
+                if rows:
+                    self._conn.executemany(
+                        "UPDATE embeddings SET last_used = ? WHERE hash = ?",
+                        [(time.time(), key) for key, _ in rows]
+                    )
+                    self._conn.commit()
+        
+        # Encode everything still missing in one batch, outside the lock
+        to_encode = {}
+        for key, text in zip(keys, texts):
+            if key not in found:
+                to_encode.setdefault(key, text)
+        if to_encode:
+            vectors = np.asarray(encode_fn(list(to_encode.values())), dtype=np.float32)
+            with self._lock:
+                self.misses += len(to_encode)
+                now = time.time()
+                rows = []
+                for key, vector in zip(to_encode, vectors):
+                    found[key] = vector
+                    self._remember(key, vector)
+                    rows.append((key, vector.tobytes(), now))
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO embeddings (hash, vector, last_used) VALUES (?, ?, ?)",
+                    rows
+                )
+                self._conn.commit()
+                self._inserts_since_evict += len(rows)
+                if self._inserts_since_evict >= max(1, self.max_entries // 100):
+                    self._evict()
+        
+        return np.vstack([found[key] for key in keys]).astype(np.float32, copy=False)
+    
+    def _evict(self):
+        """Trim the disk store to max_entries, dropping the least recently used vectors."""
+        self._inserts_since_evict = 0
+        count = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        if count > self.max_entries:
+            self._conn.execute(
+                """
+                DELETE FROM embeddings WHERE hash IN (
+                    SELECT hash FROM embeddings ORDER BY last_used LIMIT ?
+                )
+                """,
+                (count - self.max_entries,)
+            )
+            self._conn.commit()
+    
+    def stats(self) -> Dict:
+        """Hit/miss counters for both tiers."""
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory)
+            }
@@ -0,0 +1,52 @@
+from typing import Optional
+import os
+import torch
+from transformers import AutoTokenizer, pipeline
+from ..utils.config import ONNX_CACHE_DIR
+
+NLP_BACKENDS = ("torch", "int8", "onnx")
+
+def _quantize_int8(pipe):
+    """Swap the pipeline's Linear layers for dynamically quantized int8 versions."""
+    pipe.model = torch.quantization.quantize_dynamic(
+        pipe.model,
+        {torch.nn.Linear},
+        dtype=torch.qint8
+    )
+    return pipe
+
+def _onnx_model(task: str, model: str):
+    """Load an ONNX Runtime model, exporting and caching it on first use."""
+    try:
+        from optimum.onnxruntime import (
+            ORTModelForSeq2SeqLM,
+            ORTModelForSequenceClassification
+        )
+    except ImportError:
+        raise RuntimeError("NLP backend 'onnx' needs optimum[onnxruntime]: pip install optimum[onnxruntime]")
+
+    model_class = ORTModelForSeq2SeqLM if task == "summarization" else ORTModelForSequenceClassification
+    export_dir = os.path.join(ONNX_CACHE_DIR, model.replace("/", "--"))
+    if os.path.isdir(export_dir):
+        return model_class.from_pretrained(export_dir)
+
+    # Export once; later processes load the saved graph directly
+    ort_model = model_class.from_pretrained(model, export=True)
+    ort_model.save_pretrained(export_dir)
+    AutoTokenizer.from_pretrained(model).save_pretrained(export_dir)
+    return ort_model
+
+def build_pipeline(task: str, model: str, backend: Optional[str] = None):
+    """Build a CPU transformers pipeline running on the given inference backend."""
+    backend = backend or "torch"
+    if backend == "torch":
+        return pipeline(task, model=model, device=-1)
+    if backend == "int8":
+        return _quantize_int8(pipeline(task, model=model, device=-1))
+    if backend == "onnx":
+        return pipeline(
+            task,
+            model=_onnx_model(task, model),
+            tokenizer=AutoTokenizer.from_pretrained(model)
+        )
+    raise ValueError(f"Unknown NLP backend: {backend}. Options: {NLP_BACKENDS}")
@@ -1,27 +1,94 @@
-from transformers import pipeline
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
+import re
+import threading
+import time
 import numpy as np
+import torch
+from .nlp_backends import build_pipeline
 from .rag_database import RAGDatabase
-from ..utils.config import MAX_SUMMARY_LENGTH, MIN_SUMMARY_LENGTH
+from ..utils.config import (
+    SUMMARIZER_MODEL,
+    CLASSIFIER_MODEL,
+    SENTIMENT_MODEL,
+    NLP_BACKEND,
+    MAX_SUMMARY_LENGTH,
+    MIN_SUMMARY_LENGTH,
+    SUMMARY_CHUNK_TOKENS,
+    SUMMARY_MAP_MAX_LENGTH,
+    SUMMARY_MAP_MIN_LENGTH,
+    SUMMARY_BATCH_SIZE,
+    KEY_POINT_SCORER,
+    KEY_POINT_TIME_BUDGET,
+    KEY_POINT_BLOCK_SENTENCES,
+    KEY_POINT_BATCH_SIZE,
+    EMBEDDING_BATCH_SIZE
+)
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+# Candidate labels for key-point classification
+KEY_POINT_LABELS = [
+    "main point",
+    "key detail",
+    "important fact",
+    "crucial information",
+    "significant finding"
+]
+
+# Common topic categories
+TOPIC_CATEGORIES = [
+    "technology", "science", "business", "health",
+    "education", "politics", "environment", "society",
+    "culture", "sports"
+]
+
+# Labels deciding whether a key point names a taggable concept
+TAG_LABELS = ["concept", "term", "topic", "theme"]
+
+# Same template the zero-shot pipeline uses by default
+HYPOTHESIS_TEMPLATE = "This example is {}."
 
 class NLPProcessor:
-    def __init__(self):
-        # Initialize summarization pipeline
-        self.summarizer = pipeline(
-            "summarization",
-            model="facebook/bart-large-cnn",
-            device=-1  # Use CPU. Change to 0 for GPU
-        )
+    def __init__(self, db: Optional[RAGDatabase] = None, backend: Optional[str] = None):
+        self.backend = backend or NLP_BACKEND
         
-        # Initialize zero-shot classification for key points
-        self.classifier = pipeline(
-            "zero-shot-classification",
-            model="facebook/bart-large-mnli",
-            device=-1
-        )
+        # Pipelines are loaded on first use and then kept for the life of the processor
+        self._summarizer = None
+        self._classifier = None
+        self._sentiment_analyzer = None
+        self._load_lock = threading.Lock()
         
         # Initialize RAG database connection
-        self.db = RAGDatabase()
+        self.db = db or RAGDatabase()
+        
+        # Key-point label embeddings for the cheap scorer, computed on first use
+        self._label_embeddings = None
+    
+    def _load_pipeline(self, attr: str, task: str, model: str):
+        """Build a pipeline once and cache it on the given attribute."""
+        with self._load_lock:
+            if getattr(self, attr) is None:
+                setattr(self, attr, build_pipeline(task, model, self.backend))
+        return getattr(self, attr)
+    
+    @property
+    def summarizer(self):
+        if self._summarizer is None:
+            return self._load_pipeline("_summarizer", "summarization", SUMMARIZER_MODEL)
+        return self._summarizer
+    
+    @property
+    def classifier(self):
+        # Zero-shot classification for key points, topics and tags
+        if self._classifier is None:
+            return self._load_pipeline("_classifier", "zero-shot-classification", CLASSIFIER_MODEL)
+        return self._classifier
+    
+    @property
+    def sentiment_analyzer(self):
+        if self._sentiment_analyzer is None:
+            return self._load_pipeline("_sentiment_analyzer", "sentiment-analysis", SENTIMENT_MODEL)
+        return self._sentiment_analyzer
     
     def generate_summary(self, 
                         text: str,
@@ -30,23 +97,11 @@ class NLPProcessor:
                         min_length: int = MIN_SUMMARY_LENGTH) -> Dict:
         """Generate a concise summary of the text."""
         try:
-            # Split long text into chunks if needed
-            max_input_length = self.summarizer.tokenizer.model_max_length
-            chunks = [text[i:i + max_input_length] for i in range(0, len(text), max_input_length)]
-            
-            # Generate summary for each chunk
-            summaries = []
-            for chunk in chunks:
-                summary = self.summarizer(
-                    chunk,
-                    max_length=max_length // len(chunks),
-                    min_length=min_length // len(chunks),
-                    do_sample=False
-                )[0]["summary_text"]
-                summaries.append(summary)
-            
-            # Combine summaries
-            final_summary = " ".join(summaries)
+            final_summary = self.summarize_text(
+                text,
+                max_length=max_length or MAX_SUMMARY_LENGTH,
+                min_length=min_length or MIN_SUMMARY_LENGTH
+            )
             
             # Extract key points
             key_points = self._extract_key_points(text)
@@ -65,71 +120,149 @@ class NLPProcessor:
         except Exception as e:
             raise RuntimeError(f"Summarization failed: {str(e)}")
     
+    def _chunk_tokens(self) -> int:
+        # Leave room for the special tokens the tokenizer adds
+        return min(SUMMARY_CHUNK_TOKENS, self.summarizer.tokenizer.model_max_length - 2)
+    
+    def _token_chunks(self, text: str) -> List[str]:
+        """Pack whole sentences into chunks that fit the summarizer's input window."""
+        tokenizer = self.summarizer.tokenizer
+        limit = self._chunk_tokens()
+        sentences = [s for s in _SENTENCE_END.split(text) if s.strip()]
+        if not sentences:
+            return []
+        
+        # One batched tokenizer call for all sentences
+        token_ids = tokenizer(sentences, add_special_tokens=False)["input_ids"]
+        
+        chunks = []
+        current = []
+        current_tokens = 0
+        for sentence, ids in zip(sentences, token_ids):
+            if len(ids) > limit:
+                # A single overlong sentence is split on token boundaries
+                if current:
+                    chunks.append(" ".join(current))
+                    current, current_tokens = [], 0
+                for i in range(0, len(ids), limit):
+                    chunks.append(tokenizer.decode(ids[i:i + limit]))
+                continue
+            if current_tokens + len(ids) > limit:
+                chunks.append(" ".join(current))
+                current, current_tokens = [], 0
+            current.append(sentence)
+            current_tokens += len(ids)
+        if current:
+            chunks.append(" ".join(current))
+        return chunks
+    
+    def _summarize_batch(self, chunks: List[str], max_length: int, min_length: int) -> List[str]:
+        """Summarize many chunks through the pipeline in batched forward passes."""
+        outputs = self.summarizer(
+            chunks,
+            max_length=max_length,
+            min_length=min(min_length, max_length - 1),
+            do_sample=False,
+            truncation=True,
+            batch_size=SUMMARY_BATCH_SIZE
+        )
+        return [output["summary_text"] for output in outputs]
+    
+    def summarize_text(self,
+                       text: str,
+                       max_length: int = MAX_SUMMARY_LENGTH,
+                       min_length: int = MIN_SUMMARY_LENGTH) -> str:
+        """
+        Hierarchical map-reduce summary.
+        
+        The text is split into token-bounded chunks which are summarized in batches (map).
+        The partial summaries are joined and summarized again until they fit a single
+        input window (reduce), and that window gets the final max/min length.
+        """
+        chunks = self._token_chunks(text)
+        while len(chunks) > 1:
+            partials = self._summarize_batch(chunks, SUMMARY_MAP_MAX_LENGTH, SUMMARY_MAP_MIN_LENGTH)
+            reduced = self._token_chunks(" ".join(partials))
+            if len(reduced) >= len(chunks):
+                # Chunks too small to shrink further; the final call truncates
+                chunks = [" ".join(partials)]
+                break
+            chunks = reduced
+        
+        if not chunks:
+            return ""
+        return self._summarize_batch(chunks, max_length, min_length)[0]
+    
     def _extract_key_points(self, text: str, max_points: int = 5) -> List[str]:
-        """Extract key points from text using zero-shot classification."""
-        # Define candidate labels for classification
-        labels = [
-            "main point",
-            "key detail",
-            "important fact",
-            "crucial information",
-            "significant finding"
-        ]
+        """
+        Extract key points from text using zero-shot classification.
         
+        Sentences are scored in blocks, each block as one batched pipeline call over all
+        sentence-label pairs, stopping once max_points are found. If KEY_POINT_TIME_BUDGET
+        runs out first, the unscored remainder is ranked by embedding similarity instead.
+        """
         # Split text into sentences
         sentences = [s.strip() for s in text.split(".") if len(s.strip()) > 10]
+        if KEY_POINT_SCORER == "embedding":
+            return self._key_points_by_embedding(sentences, max_points)
         
+        deadline = time.perf_counter() + KEY_POINT_TIME_BUDGET
         key_points = []
-        for sentence in sentences:
-            result = self.classifier(
-                sentence,
-                labels,
-                multi_label=True
+        position = 0
+        while position < len(sentences) and len(key_points) < max_points and time.perf_counter() < deadline:
+            block = sentences[position:position + KEY_POINT_BLOCK_SENTENCES]
+            results = self.classifier(
+                block,
+                KEY_POINT_LABELS,
+                multi_label=True,
+                batch_size=KEY_POINT_BATCH_SIZE
             )
+            if isinstance(results, dict):
+                results = [results]
             
             # If any label has high confidence, consider it a key point
-            if max(result["scores"]) > 0.8:
-                key_points.append(sentence)
-            
-            if len(key_points) >= max_points:
-                break
+            for sentence, result in zip(block, results):
+                if max(result["scores"]) > 0.8:
+                    key_points.append(sentence)
+                    if len(key_points) >= max_points:
+                        break
+            position += len(block)
+        
+        # Budget exhausted before the text was covered: rank the rest cheaply
+        if len(key_points) < max_points and position < len(sentences):
+            key_points.extend(self._key_points_by_embedding(sentences[position:], max_points - len(key_points)))
+        
+        return key_points[:max_points]
+    
+    def _key_points_by_embedding(self, sentences: List[str], max_points: int) -> List[str]:
+        """Pick the sentences closest to the key-point labels in embedding space, in text order."""
+        if not sentences or max_points <= 0:
+            return []
         
-        return key_points
+        model = self.db.embedding_model
+        if self._label_embeddings is None:
+            self._label_embeddings = model.encode(KEY_POINT_LABELS, normalize_embeddings=True)
+        sentence_embeddings = model.encode(sentences, batch_size=EMBEDDING_BATCH_SIZE, normalize_embeddings=True)
+        
+        scores = (sentence_embeddings @ self._label_embeddings.T).max(axis=1)
+        top = np.argsort(-scores)[:max_points]
+        return [sentences[i] for i in sorted(top)]
     
     def analyze_sentiment(self, text: str) -> Dict:
         """Analyze sentiment and emotion in the text."""
-        sentiment_analyzer = pipeline(
-            "sentiment-analysis",
-            model="distilbert-base-uncased-finetuned-sst-2-english",
-            device=-1
-        )
-        
         # Get overall sentiment
-        sentiment = sentiment_analyzer(text)[0]
+        sentiment = self.sentiment_analyzer(text, truncation=True)[0]
         
         return {
             "sentiment": sentiment["label"],
             "confidence": float(sentiment["score"])
         }
     
-    def extract_topics(self, text: str, num_topics: int = 3) -> List[str]:
-        """Extract main topics from the text."""
-        # Define common topic categories
-        topic_categories = [
-            "technology", "science", "business", "health",
-            "education", "politics", "environment", "society",
-            "culture", "sports"
-        ]
-        
-        result = self.classifier(
-            text,
-            topic_categories,
-            multi_label=True
-        )
-        
-        # Return top N topics with scores
+    @staticmethod
+    def _rank_topics(labels: List[str], scores, num_topics: int) -> List[Dict]:
+        """Top N topics above the confidence threshold."""
         topics = []
-        for label, score in zip(result["labels"], result["scores"]):
+        for label, score in zip(labels, scores):
             if score > 0.3:  # Confidence threshold
                 topics.append({
                     "topic": label,
@@ -138,6 +271,29 @@ class NLPProcessor:
         
         return sorted(topics, key=lambda x: x["confidence"], reverse=True)[:num_topics]
     
+    def extract_topics(self, text: str, num_topics: int = 3) -> List[str]:
+        """Extract main topics from the text."""
+        result = self.classifier(
+            text,
+            TOPIC_CATEGORIES,
+            multi_label=True
+        )
+        
+        # Return top N topics with scores
+        return self._rank_topics(result["labels"], result["scores"], num_topics)
+    
+    @staticmethod
+    def _combine_tags(topics: List[Dict], key_points: List[str], tag_scores, max_tags: int) -> List[str]:
+        """Topic names plus the leading word of each key point that reads as a concept."""
+        tags = dict.fromkeys(topic["topic"].lower() for topic in topics)
+        for point, scores in zip(key_points, tag_scores):
+            if max(scores) > 0.7:
+                # Add the first significant word as a tag
+                words = point.split()
+                if words:
+                    tags[words[0].lower()] = None
+        return list(tags)[:max_tags]
+    
     def generate_tags(self, text: str, max_tags: int = 5) -> List[str]:
         """Generate relevant tags for the content."""
         # Extract topics
@@ -146,31 +302,65 @@ class NLPProcessor:
         # Get key points
         key_points = self._extract_key_points(text)
         
-        # Combine and process to create tags
-        tags = set()
-        
-        # Add topics as tags
-        for topic in topics:
-            tags.add(topic["topic"].lower())
-        
-        # Extract potential tags from key points
+        # Score all key points against the tag labels in one batched call
+        tag_scores = []
         if key_points:
-            classifier = pipeline(
-                "zero-shot-classification",
-                model="facebook/bart-large-mnli",
-                device=-1
+            results = self.classifier(
+                key_points,
+                candidate_labels=TAG_LABELS,
+                multi_label=True,
+                batch_size=KEY_POINT_BATCH_SIZE
             )
-            
-            for point in key_points:
-                result = classifier(
-                    point,
-                    candidate_labels=["concept", "term", "topic", "theme"],
-                    multi_label=True
-                )
-                if max(result["scores"]) > 0.7:
-                    # Add the first significant word as a tag
-                    words = point.split()
-                    if words:
-                        tags.add(words[0].lower())
-        
-        return list(tags)[:max_tags]
\ No newline at end of file
+            if isinstance(results, dict):
+                results = [results]
+            tag_scores = [result["scores"] for result in results]
+        
+        return self._combine_tags(topics, key_points, tag_scores, max_tags)
+    
+    def _entailment_scores(self, pairs: List[Tuple[str, str]]) -> np.ndarray:
+        """Multi-label zero-shot scores for (premise, hypothesis) pairs, tokenized and run in shared batches."""
+        if not pairs:
+            return np.empty(0, dtype=np.float32)
+        
+        tokenizer = self.classifier.tokenizer
+        model = self.classifier.model
+        entailment_id = self.classifier.entailment_id
+        contradiction_id = -1 if entailment_id == 0 else 0
+        
+        scores = []
+        with torch.no_grad():
+            for i in range(0, len(pairs), KEY_POINT_BATCH_SIZE):
+                batch = pairs[i:i + KEY_POINT_BATCH_SIZE]
+                inputs = tokenizer(
+                    [premise for premise, _ in batch],
+                    [hypothesis for _, hypothesis in batch],
+                    padding=True,
+                    truncation="only_first",
+                    return_tensors="pt"
+                ).to(model.device)
+                logits = model(**inputs).logits[:, [contradiction_id, entailment_id]]
+                scores.append(logits.softmax(dim=-1)[:, 1].cpu().numpy())
+        return np.concatenate(scores)
+    
+    def analyze(self, text: str, num_topics: int = 3, max_tags: int = 5) -> Dict:
+        """
+        Sentiment, topics and tags in a single pass.
+        
+        Topic and tag hypotheses share one batched NLI tokenization and forward pass,
+        and the topics are computed once instead of again inside generate_tags.
+        """
+        sentiment = self.analyze_sentiment(text)
+        key_points = self._extract_key_points(text)
+        
+        pairs = [(text, HYPOTHESIS_TEMPLATE.format(label)) for label in TOPIC_CATEGORIES]
+        pairs += [(point, HYPOTHESIS_TEMPLATE.format(label)) for point in key_points for label in TAG_LABELS]
+        scores = self._entailment_scores(pairs)
+        
+        topics = self._rank_topics(TOPIC_CATEGORIES, scores[:len(TOPIC_CATEGORIES)], num_topics)
+        tag_scores = scores[len(TOPIC_CATEGORIES):].reshape(len(key_points), len(TAG_LABELS))
+        
+        return {
+            "sentiment": sentiment,
+            "topics": topics,
+            "tags": self._combine_tags(topics, key_points, tag_scores, max_tags)
+        }
@@ -1,22 +1,73 @@
-from typing import List, Dict, Optional
+from typing import Iterator, List, Dict, Optional, Tuple
+from collections import deque
+import re
+import threading
+import time
+import numpy as np
 import openai
 from .rag_database import RAGDatabase
-from ..utils.config import OPENAI_API_KEY, TOP_K_RESULTS
+from .answer_cache import AnswerCache
+from .reranker import Reranker
+from .context_packer import pack_context
+from ..utils.config import (
+    OPENAI_API_KEY,
+    OPENAI_API_BASE,
+    LLM_MODEL,
+    LLM_CONTEXT_WINDOW,
+    CONTEXT_TOKEN_BUDGET,
+    TOP_K_RESULTS,
+    RERANK_CANDIDATES,
+    CITATION_MODE,
+    ANSWER_CACHE_THRESHOLD,
+    ANSWER_CACHE_MAX_ENTRIES,
+    ANSWER_CACHE_TTL
+)
+from ..utils.tokens import count_tokens
+
+SYSTEM_PROMPT = "You are a helpful assistant that answers questions based on provided context."
+NO_RESULTS_ANSWER = "I couldn't find any relevant information to answer your question."
+CITATION_SYSTEM_PROMPT = "Provide answers with explicit citations to the source material using square brackets."
+
+# Instructions, separators and titles around the retrieved context
+PROMPT_OVERHEAD_TOKENS = 200
+
+# Citation markers such as "[2]" or "[1, 3]", with the whitespace before them
+_CITATION_MARKER = re.compile(r"\s*\[(\d+(?:\s*,\s*\d+)*)\]")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
 
 class QueryEngine:
-    def __init__(self):
-        self.db = RAGDatabase()
+    def __init__(self, db: Optional[RAGDatabase] = None, reranker: Optional[Reranker] = None):
+        self.db = db or RAGDatabase()
+        # Optional cross-encoder stage between search and the prompt
+        self.reranker = reranker
         openai.api_key = OPENAI_API_KEY
+        if OPENAI_API_BASE:
+            openai.api_base = OPENAI_API_BASE
+        
+        # Answers reused for near-identical questions over the same retrieved chunks
+        self.answer_cache = AnswerCache(
+            threshold=ANSWER_CACHE_THRESHOLD,
+            max_entries=ANSWER_CACHE_MAX_ENTRIES,
+            ttl=ANSWER_CACHE_TTL
+        )
+        
+        # Recent time-to-first-token samples from streamed answers
+        self._ttft_ms = deque(maxlen=1000)
+        self._metrics_lock = threading.Lock()
+        self._packed_queries = 0
+        self._tokens_saved = 0
     
-    def _format_context(self, relevant_chunks: List[Dict]) -> str:
-        """Format retrieved chunks into context string."""
+    def _format_context(self, relevant_chunks: List[Dict], numbered: bool = False) -> str:
+        """Format retrieved chunks into context string, optionally numbered as [1], [2], ... for citing."""
         context_parts = []
-        for chunk in relevant_chunks:
+        for number, chunk in enumerate(relevant_chunks, start=1):
             context = f"Content: {chunk['content']}"
             if chunk['title']:
                 context = f"Title: {chunk['title']}\n{context}"
             if chunk['start_time'] is not None:
                 context += f"\n(Time: {chunk['start_time']:.2f}s - {chunk['end_time']:.2f}s)"
+            if numbered:
+                context = f"[{number}] {context}"
             context_parts.append(context)
         
         return "\n\n---\n\n".join(context_parts)
@@ -32,70 +83,262 @@ Question: {query}
 
 Answer:"""
     
+    def _retrieve(self,
+                  query: str,
+                  note_id: Optional[int] = None,
+                  start_date: Optional[str] = None,
+                  end_date: Optional[str] = None,
+                  tags: Optional[List[str]] = None,
+                  query_embedding: Optional[np.ndarray] = None) -> List[Dict]:
+        """Retrieve the chunks relevant to a query."""
+        if note_id:
+            # If note_id provided, limit search to specific note
+            note = self.db.get_note(note_id)
+            if not note:
+                raise ValueError(f"Note with ID {note_id} not found")
+        
+        # Filters are applied inside the vector search, so scoped queries still get k results
+        relevant_chunks = self.db.search(
+            query,
+            # Over-fetch so the reranker has candidates to promote
+            k=RERANK_CANDIDATES if self.reranker else TOP_K_RESULTS,
+            note_id=note_id,
+            start_date=start_date,
+            end_date=end_date,
+            tags=tags,
+            query_embedding=query_embedding
+        )
+        
+        if self.reranker:
+            relevant_chunks, _ = self.reranker.rerank(query, relevant_chunks, top_n=TOP_K_RESULTS)
+        return relevant_chunks
+    
+    @staticmethod
+    def context_budget(query: str, max_tokens: int) -> int:
+        """Tokens of retrieved context that fit in the prompt; zero or less leaves no room for any."""
+        return min(
+            CONTEXT_TOKEN_BUDGET,
+            LLM_CONTEXT_WINDOW - max_tokens - count_tokens(query) - PROMPT_OVERHEAD_TOKENS
+        )
+    
+    def _pack(self, query: str, relevant_chunks: List[Dict], max_tokens: int) -> Tuple[List[Dict], Dict]:
+        """Deduplicate, merge and trim retrieved chunks to the prompt's context budget."""
+        budget = self.context_budget(query, max_tokens)
+        packed, report = pack_context(relevant_chunks, max(budget, 0))
+        with self._metrics_lock:
+            self._packed_queries += 1
+            self._tokens_saved += report["tokens_saved"]
+        return packed, report
+    
+    @staticmethod
+    def _cache_context(relevant_chunks: List[Dict], mode: str, max_tokens: int) -> str:
+        """Answer-cache context key: the retrieved chunk ids plus everything else shaping the answer."""
+        return AnswerCache.context_key(
+            [i for chunk in relevant_chunks for i in chunk.get("chunk_ids", [chunk["embedding_id"]])],
+            {"mode": mode, "max_tokens": max_tokens, "model": LLM_MODEL}
+        )
+    
+    @staticmethod
+    def _format_sources(relevant_chunks: List[Dict]) -> List[Dict]:
+        """Format retrieved chunks as the sources returned to the client."""
+        sources = []
+        for chunk in relevant_chunks:
+            source = {
+                "chunk_id": chunk["embedding_id"],
+                "chunk_ids": chunk.get("chunk_ids", [chunk["embedding_id"]]),
+                "content": chunk["content"],
+                "note_id": chunk["note_id"],
+                "score": chunk["score"]
+            }
+            if "score_source" in chunk:
+                source["score_source"] = chunk["score_source"]
+            if "rrf_score" in chunk:
+                source["rrf_score"] = chunk["rrf_score"]
+            if chunk["start_time"] is not None:
+                source["timestamp"] = {
+                    "start": chunk["start_time"],
+                    "end": chunk["end_time"]
+                }
+            sources.append(source)
+        return sources
+    
+    def _answer_messages(self, query: str, relevant_chunks: List[Dict]) -> List[Dict]:
+        """Chat messages asking the LLM to answer from the retrieved chunks."""
+        # Format context from retrieved chunks
+        context = self._format_context(relevant_chunks)
+        return [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": self._generate_prompt(query, context)}
+        ]
+    
     def query(self, 
               query: str,
               note_id: Optional[int] = None,
-              max_tokens: int = 150) -> Dict:
+              max_tokens: int = 150,
+              start_date: Optional[str] = None,
+              end_date: Optional[str] = None,
+              tags: Optional[List[str]] = None) -> Dict:
         """Process a query and return relevant answer."""
         try:
             # Retrieve relevant chunks
-            if note_id:
-                # If note_id provided, limit search to specific note
-                note = self.db.get_note(note_id)
-                if not note:
-                    raise ValueError(f"Note with ID {note_id} not found")
-                relevant_chunks = self.db.search(query, k=TOP_K_RESULTS)
-                relevant_chunks = [c for c in relevant_chunks if c["note_id"] == note_id]
-            else:
-                # Search across all notes
-                relevant_chunks = self.db.search(query, k=TOP_K_RESULTS)
+            query_embedding = self.db.embed_query(query)
+            relevant_chunks = self._retrieve(query, note_id, start_date, end_date, tags, query_embedding)
             
             if not relevant_chunks:
                 return {
-                    "answer": "I couldn't find any relevant information to answer your question.",
+                    "answer": NO_RESULTS_ANSWER,
                     "sources": []
                 }
             
-            # Format context from retrieved chunks
-            context = self._format_context(relevant_chunks)
+            relevant_chunks, packing = self._pack(query, relevant_chunks, max_tokens)
+            # Nothing fit the context budget; don't ask, or cache, an answer without context
+            if not relevant_chunks:
+                return {
+                    "answer": NO_RESULTS_ANSWER,
+                    "sources": [],
+                    "context": packing
+                }
+            result = self._answer(query, query_embedding, relevant_chunks, max_tokens)
+            result["context"] = packing
+            return result
+            
+        except Exception as e:
+            raise RuntimeError(f"Query processing failed: {str(e)}")
+    
+    def _answer(self,
+                query: str,
+                query_embedding: np.ndarray,
+                relevant_chunks: List[Dict],
+                max_tokens: int) -> Dict:
+        """Answer from the retrieved chunks, reusing a cached answer when one matches."""
+        context = self._cache_context(relevant_chunks, "answer", max_tokens)
+        cached = self.answer_cache.get(query_embedding, context)
+        if cached is not None:
+            return cached
+        
+        # Get response from LLM
+        response = openai.ChatCompletion.create(
+            model=LLM_MODEL,
+            messages=self._answer_messages(query, relevant_chunks),
+            max_tokens=max_tokens,
+            temperature=0.7
+        )
+        
+        result = {
+            "answer": response.choices[0].message["content"].strip(),
+            "sources": self._format_sources(relevant_chunks)
+        }
+        self.answer_cache.put(query_embedding, context, result)
+        return result
+    
+    def query_stream(self,
+                     query: str,
+                     note_id: Optional[int] = None,
+                     max_tokens: int = 150,
+                     start_date: Optional[str] = None,
+                     end_date: Optional[str] = None,
+                     tags: Optional[List[str]] = None) -> Iterator[Tuple[str, Dict]]:
+        """
+        Process a query, yielding (event, data) pairs as the answer is generated.
+        
+        Yields "sources" as soon as retrieval finishes, then one "token" per streamed
+        completion delta, then "done" with the full answer and timing metrics.
+        """
+        try:
+            start = time.perf_counter()
+            query_embedding = self.db.embed_query(query)
+            relevant_chunks = self._retrieve(query, note_id, start_date, end_date, tags, query_embedding)
+            if not relevant_chunks:
+                yield "sources", {"sources": []}
+                yield "done", {
+                    "answer": NO_RESULTS_ANSWER,
+                    "metrics": {"retrieval_ms": (time.perf_counter() - start) * 1000}
+                }
+                return
+            
+            relevant_chunks, packing = self._pack(query, relevant_chunks, max_tokens)
+            retrieval_ms = (time.perf_counter() - start) * 1000
+            yield "sources", {"sources": self._format_sources(relevant_chunks), "context": packing}
+            if not relevant_chunks:
+                yield "done", {"answer": NO_RESULTS_ANSWER, "metrics": {"retrieval_ms": retrieval_ms}}
+                return
             
-            # Generate prompt
-            prompt = self._generate_prompt(query, context)
+            # A cached answer is sent as a single token
+            context = self._cache_context(relevant_chunks, "answer", max_tokens)
+            cached = self.answer_cache.get(query_embedding, context)
+            if cached is not None:
+                yield "token", {"text": cached["answer"]}
+                yield "done", {
+                    "answer": cached["answer"],
+                    "metrics": {
+                        "retrieval_ms": retrieval_ms,
+                        "total_ms": (time.perf_counter() - start) * 1000,
+                        "cached": True
+                    }
+                }
+                return
             
-            # Get response from LLM
+            llm_start = time.perf_counter()
             response = openai.ChatCompletion.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "You are a helpful assistant that answers questions based on provided context."},
-                    {"role": "user", "content": prompt}
-                ],
+                model=LLM_MODEL,
+                messages=self._answer_messages(query, relevant_chunks),
                 max_tokens=max_tokens,
-                temperature=0.7
+                temperature=0.7,
+                stream=True
             )
             
-            # Format sources
-            sources = []
-            for chunk in relevant_chunks:
-                source = {
-                    "content": chunk["content"],
-                    "note_id": chunk["note_id"],
-                    "score": chunk["score"]
-                }
-                if chunk["start_time"] is not None:
-                    source["timestamp"] = {
-                        "start": chunk["start_time"],
-                        "end": chunk["end_time"]
-                    }
-                sources.append(source)
+            parts = []
+            first_token_at = None
+            for chunk in response:
+                text = chunk.choices[0].delta.get("content")
+                if not text:
+                    continue
+                if first_token_at is None:
+                    first_token_at = time.perf_counter()
+                parts.append(text)
+                yield "token", {"text": text}
             
-            return {
-                "answer": response.choices[0].message["content"].strip(),
-                "sources": sources
+            end = time.perf_counter()
+            metrics = {
+                "retrieval_ms": retrieval_ms,
+                "total_ms": (end - start) * 1000,
+                "tokens": len(parts)
             }
+            if first_token_at is not None:
+                metrics["ttft_ms"] = (first_token_at - start) * 1000
+                metrics["llm_ttft_ms"] = (first_token_at - llm_start) * 1000
+                with self._metrics_lock:
+                    self._ttft_ms.append(metrics["ttft_ms"])
+            
+            answer = "".join(parts).strip()
+            self.answer_cache.put(query_embedding, context, {
+                "answer": answer,
+                "sources": self._format_sources(relevant_chunks)
+            })
+            yield "done", {"answer": answer, "metrics": metrics}
             
         except Exception as e:
             raise RuntimeError(f"Query processing failed: {str(e)}")
     
+    def metrics(self) -> Dict:
+        """Time-to-first-token statistics over recent streamed answers, plus packing, answer-cache and rerank stats."""
+        with self._metrics_lock:
+            ttft = np.array(self._ttft_ms)
+            packed_queries, tokens_saved = self._packed_queries, self._tokens_saved
+        return {
+            "streamed": len(ttft),
+            "ttft_ms_mean": float(ttft.mean()) if len(ttft) else 0.0,
+            "ttft_ms_p50": float(np.percentile(ttft, 50)) if len(ttft) else 0.0,
+            "ttft_ms_p95": float(np.percentile(ttft, 95)) if len(ttft) else 0.0,
+            "context_packing": {
+                "queries": packed_queries,
+                "tokens_saved": tokens_saved,
+                "tokens_saved_mean": tokens_saved / packed_queries if packed_queries else 0.0
+            },
+            "answer_cache": self.answer_cache.stats(),
+            "reranker": self.reranker.stats() if self.reranker else None
+        }
+    
     def suggest_followup_questions(self, 
                                  query: str,
                                  answer: str,
@@ -112,7 +355,7 @@ Follow-up Questions:"""
         
         try:
             response = openai.ChatCompletion.create(
-                model="gpt-3.5-turbo",
+                model=LLM_MODEL,
                 messages=[
                     {"role": "system", "content": "Generate relevant follow-up questions based on the previous Q&A."},
                     {"role": "user", "content": prompt}
@@ -130,22 +373,106 @@ Follow-up Questions:"""
         except Exception:
             return []  # Return empty list if suggestion generation fails
     
-    def get_answer_with_citations(self, 
-                                query: str,
-                                note_id: Optional[int] = None) -> Dict:
-        """Get answer with specific citations to source material."""
-        # Get basic answer first
-        result = self.query(query, note_id)
+    @staticmethod
+    def _parse_citations(text: str, relevant_chunks: List[Dict]) -> Tuple[str, List[Dict]]:
+        """
+        Strip [n] markers that resolve to a retrieved chunk and map each cited span to its sources.
         
-        if not result["sources"]:
-            return result
+        A span runs from the start of the sentence containing a marker to the marker;
+        start and end are character offsets into the returned clean answer.
+        """
+        answer = ""
+        citations = []
+        last = 0
+        for match in _CITATION_MARKER.finditer(text):
+            numbers = [int(n) for n in match.group(1).split(",")]
+            sources = []
+            for number in numbers:
+                if 1 <= number <= len(relevant_chunks):
+                    chunk = relevant_chunks[number - 1]
+                    source = {
+                        "source": number - 1,
+                        "chunk_id": chunk["embedding_id"],
+                        "chunk_ids": chunk.get("chunk_ids", [chunk["embedding_id"]]),
+                        "note_id": chunk["note_id"]
+                    }
+                    if chunk["start_time"] is not None:
+                        source["timestamp"] = {
+                            "start": chunk["start_time"],
+                            "end": chunk["end_time"]
+                        }
+                    sources.append(source)
+            # Brackets that name no retrieved source, such as "[2024]", are part of the answer
+            if not sources:
+                continue
+            answer += text[last:match.start()]
+            last = match.end()
+            
+            end = len(answer.rstrip())
+            # Adjacent markers such as "[1][2]" cite the same span
+            if citations and citations[-1]["end"] == end:
+                known = {source["source"] for source in citations[-1]["sources"]}
+                citations[-1]["sources"].extend(s for s in sources if s["source"] not in known)
+                continue
+            
+            start = 0
+            for boundary in _SENTENCE_END.finditer(answer, 0, max(end - 1, 0)):
+                start = boundary.end()
+            citations.append({
+                "start": start,
+                "end": end,
+                "text": answer[start:end],
+                "sources": sources
+            })
+        answer += text[last:]
+        
+        # Drop whitespace left behind by markers without moving any span offsets
+        return answer.rstrip(), citations
+    
+    def _citations_single(self, query: str, relevant_chunks: List[Dict], max_tokens: int) -> Dict:
+        """Answer and cite in one completion over numbered sources."""
+        prompt = f"""Please answer the question based on the provided context. After each claim, cite the numbered sources that support it in square brackets, e.g. [1] or [1, 2]. If the context doesn't contain enough information to answer the question, please say so.
+
+Context:
+{self._format_context(relevant_chunks, numbered=True)}
+
+Question: {query}
+
+Answer with citations:"""
+        
+        response = openai.ChatCompletion.create(
+            model=LLM_MODEL,
+            messages=[
+                {"role": "system", "content": CITATION_SYSTEM_PROMPT},
+                {"role": "user", "content": prompt}
+            ],
+            max_tokens=max_tokens,
+            temperature=0.7
+        )
+        
+        answer_with_citations = response.choices[0].message["content"].strip()
+        answer, citations = self._parse_citations(answer_with_citations, relevant_chunks)
+        return {
+            "answer": answer,
+            "answer_with_citations": answer_with_citations,
+            "citations": citations,
+            "sources": self._format_sources(relevant_chunks)
+        }
+    
+    def _citations_two_pass(self,
+                            query: str,
+                            query_embedding: np.ndarray,
+                            relevant_chunks: List[Dict],
+                            max_tokens: int) -> Dict:
+        """Plain answer first, then a second completion adding citations."""
+        # Get basic answer first
+        result = self._answer(query, query_embedding, relevant_chunks, max_tokens)
         
         # Generate new prompt requesting citations
-        context = self._format_context(result["sources"])
         prompt = f"""Please answer the question and explicitly cite the relevant parts of the context using square brackets.
 
 Context:
-{context}
+{self._format_context(relevant_chunks, numbered=True)}
 
 Question: {query}
 
@@ -153,9 +480,9 @@ Answer with citations:"""
         
         try:
             response = openai.ChatCompletion.create(
-                model="gpt-3.5-turbo",
+                model=LLM_MODEL,
                 messages=[
-                    {"role": "system", "content": "Provide answers with explicit citations to the source material using square brackets."},
+                    {"role": "system", "content": CITATION_SYSTEM_PROMPT},
                     {"role": "user", "content": prompt}
                 ],
                 max_tokens=200,
@@ -163,7 +490,61 @@ Answer with citations:"""
             )
             
             result["answer_with_citations"] = response.choices[0].message["content"].strip()
+            _, result["citations"] = self._parse_citations(result["answer_with_citations"], relevant_chunks)
             return result
             
         except Exception:
-            return result  # Return original result if citation generation fails
\ No newline at end of file
+            return result  # Return original result if citation generation fails
+    
+    def get_answer_with_citations(self, 
+                                query: str,
+                                note_id: Optional[int] = None,
+                                max_tokens: int = 200,
+                                mode: Optional[str] = None) -> Dict:
+        """
+        Get answer with specific citations to source material.
+        
+        Citations are spans of the answer mapped to the chunk ids, notes and timestamps
+        they cite. The default single mode produces answer and citations from one
+        retrieval and one completion; two_pass keeps the earlier answer-then-cite calls.
+        """
+        mode = mode or CITATION_MODE
+        if mode not in ("single", "two_pass"):
+            raise ValueError(f"Unknown citation mode: {mode}. Options: single, two_pass")
+        
+        try:
+            query_embedding = self.db.embed_query(query)
+            relevant_chunks = self._retrieve(query, note_id, query_embedding=query_embedding)
+            
+            if not relevant_chunks:
+                return {
+                    "answer": NO_RESULTS_ANSWER,
+                    "sources": []
+                }
+            
+            relevant_chunks, packing = self._pack(query, relevant_chunks, max_tokens)
+            # Nothing fit the context budget; don't ask, or cache, an answer without context
+            if not relevant_chunks:
+                return {
+                    "answer": NO_RESULTS_ANSWER,
+                    "sources": [],
+                    "context": packing
+                }
+            context = self._cache_context(relevant_chunks, f"citations-{mode}", max_tokens)
+            cached = self.answer_cache.get(query_embedding, context)
+            if cached is None:
+                if mode == "single":
+                    cached = self._citations_single(query, relevant_chunks, max_tokens)
+                else:
+                    cached = self._citations_two_pass(query, query_embedding, relevant_chunks, max_tokens)
+                
+                # A two-pass result whose citation call failed is not worth caching
+                if "answer_with_citations" in cached:
+                    self.answer_cache.put(query_embedding, context, cached)
+            
+            result = cached
+            result["context"] = packing
+            return result
+            
+        except Exception as e:
+            raise RuntimeError(f"Query processing failed: {str(e)}")
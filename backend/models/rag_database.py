@@ -1,6 +1,9 @@
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Iterable, Callable, Tuple
 import sqlite3
 import json
+import re
+import threading
+import time
 from pathlib import Path
 import faiss
 import numpy as np
@@ -8,165 +11,827 @@ from sentence_transformers import SentenceTransformer
 from ..utils.config import (
     DATABASE_PATH,
     VECTOR_STORE_PATH,
+    VECTOR_DELTA_PATH,
     EMBEDDING_MODEL,
+    EMBEDDING_CACHE_PATH,
+    EMBEDDING_CACHE_MEMORY_SIZE,
+    EMBEDDING_CACHE_MAX_ENTRIES,
     CHUNK_SIZE,
-    CHUNK_OVERLAP
+    CHUNK_OVERLAP,
+    EMBEDDING_BATCH_SIZE,
+    INGEST_BATCH_CHUNKS,
+    RETRIEVAL_MODE,
+    HYBRID_CANDIDATES,
+    RRF_K,
+    VECTOR_INDEX_TYPE,
+    VECTOR_MMAP,
+    VECTOR_COMPACT_THRESHOLD,
+    SCOPED_EXACT_SEARCH_MAX
 )
+from ..utils.rwlock import ReadWriteLock
+from .embedding_cache import EmbeddingCache
+from .chunking import chunk_spans, segment_intervals, chunk_times
+from .vector_index import (
+    create_index,
+    index_type_of,
+    apply_search_params,
+    build_direct_map,
+    min_training_vectors,
+    get_vectors,
+    get_vectors_by_id,
+    search_params,
+    build_index,
+    read_index_mmap,
+    mmap_load_mode,
+    merge_search_results,
+    write_index_atomic,
+    file_identity,
+    evaluate_index,
+    VectorDeltaLog
+)
+
+RETRIEVAL_MODES = ("dense", "lexical", "hybrid")
+
+# After a failed index migration, retry only once the store has grown by this factor
+MIGRATION_RETRY_GROWTH = 1.5
+
+# Query terms for FTS5; each is quoted so punctuation never reaches the MATCH parser
+_FTS_TERM = re.compile(r"\w+")
+
+def connect(path: str = DATABASE_PATH) -> sqlite3.Connection:
+    """Open a SQLite connection in WAL mode so readers don't block the writer."""
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+def init_schema(conn: sqlite3.Connection):
+    """Create the notes/chunks tables and their lookup indexes."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS notes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT,
+            content TEXT NOT NULL,
+            summary TEXT,
+            audio_path TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS chunks (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            note_id INTEGER,
+            content TEXT NOT NULL,
+            embedding_id INTEGER,
+            start_time REAL,
+            end_time REAL,
+            char_start INTEGER,
+            char_end INTEGER,
+            FOREIGN KEY (note_id) REFERENCES notes (id) ON DELETE CASCADE
+        )
+    """)
+    
+    # Databases created before chunks carried character offsets
+    chunk_columns = {row[1] for row in conn.execute("PRAGMA table_info(chunks)")}
+    for column in ("char_start", "char_end"):
+        if column not in chunk_columns:
+            conn.execute(f"ALTER TABLE chunks ADD COLUMN {column} INTEGER")
+    
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS note_tags (
+            note_id INTEGER NOT NULL,
+            tag TEXT NOT NULL,
+            PRIMARY KEY (note_id, tag),
+            FOREIGN KEY (note_id) REFERENCES notes (id) ON DELETE CASCADE
+        )
+    """)
+    
+    # Full-text index over chunk content, kept in sync by triggers
+    has_fts = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'chunks_fts'"
+    ).fetchone()
+    conn.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS chunks_fts
+        USING fts5(content, content='chunks', content_rowid='id')
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS chunks_fts_insert AFTER INSERT ON chunks BEGIN
+            INSERT INTO chunks_fts (rowid, content) VALUES (new.id, new.content);
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS chunks_fts_delete AFTER DELETE ON chunks BEGIN
+            INSERT INTO chunks_fts (chunks_fts, rowid, content) VALUES ('delete', old.id, old.content);
+        END
+    """)
+    if not has_fts:
+        # Databases created before the full-text index
+        conn.execute("INSERT INTO chunks_fts (chunks_fts) VALUES ('rebuild')")
+    
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_chunks_embedding_id ON chunks (embedding_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_chunks_note_id ON chunks (note_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_notes_created_at ON notes (created_at)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_note_tags_tag ON note_tags (tag)")
+
+def fetch_chunks(conn: sqlite3.Connection, embedding_ids) -> Dict[int, Dict]:
+    """Fetch chunks for a set of FAISS ids in one query, keyed by embedding id."""
+    ids = [int(i) for i in embedding_ids if i >= 0]
+    if not ids:
+        return {}
+    
+    placeholders = ",".join("?" * len(ids))
+    rows = conn.execute(
+        f"""
+        SELECT c.embedding_id, c.note_id, c.content, c.start_time, c.end_time, n.title, n.audio_path,
+               c.char_start, c.char_end
+        FROM chunks c
+        JOIN notes n ON c.note_id = n.id
+        WHERE c.embedding_id IN ({placeholders})
+        """,
+        ids
+    ).fetchall()
+    
+    return {
+        row[0]: {
+            "embedding_id": row[0],
+            "content": row[2],
+            "note_id": row[1],
+            "title": row[5],
+            "audio_path": row[6],
+            "start_time": row[3],
+            "end_time": row[4],
+            "char_start": row[7],
+            "char_end": row[8]
+        }
+        for row in rows
+    }
+
+def _scope_conditions(note_id: Optional[int] = None,
+                      start_date: Optional[str] = None,
+                      end_date: Optional[str] = None,
+                      tags: Optional[List[str]] = None) -> Tuple[str, list]:
+    """SQL condition and parameters selecting chunks (c) of notes (n) by note, created_at range and/or tags."""
+    conditions = []
+    params = []
+    if note_id is not None:
+        conditions.append("c.note_id = ?")
+        params.append(note_id)
+    if start_date:
+        conditions.append("n.created_at >= ?")
+        params.append(start_date)
+    if end_date:
+        conditions.append("n.created_at <= ?")
+        params.append(end_date)
+    if tags:
+        placeholders = ",".join("?" * len(tags))
+        conditions.append(f"c.note_id IN (SELECT note_id FROM note_tags WHERE tag IN ({placeholders}))")
+        params.extend(tag.lower() for tag in tags)
+    
+    return (" AND ".join(conditions) if conditions else "1"), params
+
+def scope_embedding_ids(conn: sqlite3.Connection,
+                        note_id: Optional[int] = None,
+                        start_date: Optional[str] = None,
+                        end_date: Optional[str] = None,
+                        tags: Optional[List[str]] = None) -> np.ndarray:
+    """Embedding ids of the chunks matching a note, created_at range and/or tags."""
+    where, params = _scope_conditions(note_id, start_date, end_date, tags)
+    rows = conn.execute(
+        f"""
+        SELECT c.embedding_id
+        FROM chunks c
+        JOIN notes n ON c.note_id = n.id
+        WHERE {where}
+        ORDER BY c.embedding_id
+        """,
+        params
+    ).fetchall()
+    return np.array([row[0] for row in rows], dtype=np.int64)
+
+def lexical_search(conn: sqlite3.Connection,
+                   query: str,
+                   k: int,
+                   note_id: Optional[int] = None,
+                   start_date: Optional[str] = None,
+                   end_date: Optional[str] = None,
+                   tags: Optional[List[str]] = None) -> List[Tuple[int, float]]:
+    """BM25-ranked (embedding_id, score) pairs from the full-text index; higher scores rank first."""
+    terms = _FTS_TERM.findall(query)
+    if not terms:
+        return []
+    
+    # Any term may match; BM25 rewards chunks matching more and rarer terms
+    match = " OR ".join(f'"{term}"' for term in dict.fromkeys(terms))
+    where, params = _scope_conditions(note_id, start_date, end_date, tags)
+    rows = conn.execute(
+        f"""
+        SELECT c.embedding_id, bm25(chunks_fts) AS rank
+        FROM chunks_fts
+        JOIN chunks c ON c.id = chunks_fts.rowid
+        JOIN notes n ON c.note_id = n.id
+        WHERE chunks_fts MATCH ? AND {where}
+        ORDER BY rank
+        LIMIT ?
+        """,
+        [match, *params, k]
+    ).fetchall()
+    
+    # bm25() is lower-is-better
+    return [(row[0], -row[1]) for row in rows]
+
+def reciprocal_rank_fusion(rankings: List[List[int]], k: int, rrf_k: int = RRF_K) -> List[Tuple[int, float]]:
+    """Fuse ranked id lists by summing 1 / (rrf_k + rank); returns the top k (id, score) pairs."""
+    scores = {}
+    for ranking in rankings:
+        for rank, item in enumerate(ranking, start=1):
+            scores[item] = scores.get(item, 0.0) + 1.0 / (rrf_k + rank)
+    return sorted(scores.items(), key=lambda x: x[1], reverse=True)[:k]
 
 class RAGDatabase:
-    def __init__(self):
-        # Initialize embedding model
-        self.embedding_model = SentenceTransformer(EMBEDDING_MODEL)
+    def __init__(self, embedding_model: Optional[SentenceTransformer] = None):
+        # Initialize embedding model (shared via the model registry when provided)
+        self.embedding_model = embedding_model or SentenceTransformer(EMBEDDING_MODEL)
         self.embedding_dim = self.embedding_model.get_sentence_embedding_dimension()
+        self.embedding_cache = EmbeddingCache(
+            EMBEDDING_CACHE_PATH,
+            EMBEDDING_MODEL,
+            memory_size=EMBEDDING_CACHE_MEMORY_SIZE,
+            max_entries=EMBEDDING_CACHE_MAX_ENTRIES
+        )
         
         # Initialize FAISS index
-        self.index = self._load_or_create_index()
+        # Searches share the read side; adds, syncs, compaction and swaps take the write side
+        self._index_lock = ReadWriteLock()
+        self._migration_thread = None
+        self._migration_failed_at = None
+        self.index_report = None
+        self._index_read_only = False
+        self._index_load_mode = "memory"
         
-        # Initialize SQLite connection
+        # Load the snapshot and replay vectors appended since; other workers share both
+        self.delta_log = VectorDeltaLog(VECTOR_DELTA_PATH, self.embedding_dim)
+        with self.delta_log.lock(), self._index_lock.write():
+            self._load_snapshot()
+            self._sync_locked()
+            if len(self.delta_log) >= VECTOR_COMPACT_THRESHOLD:
+                self._compact_locked()
+        
+        # Initialize SQLite connection (one persistent connection per thread)
+        self._local = threading.local()
         self._init_database()
+        
+        # Move an existing index to the configured type in the background
+        self._maybe_migrate_index()
     
-    def _load_or_create_index(self) -> faiss.IndexFlatL2:
+    def _load_or_create_index(self) -> faiss.Index:
         """Load existing FAISS index or create new one."""
         if Path(VECTOR_STORE_PATH).exists():
+            # Snapshots are written atomically, so a failed read is real corruption;
+            # starting empty would silently orphan every stored chunk
             try:
-                return faiss.read_index(VECTOR_STORE_PATH)
-            except:
-                pass
+                if VECTOR_MMAP:
+                    index = read_index_mmap(VECTOR_STORE_PATH)
+                    self._index_read_only = True
+                    self._index_load_mode = mmap_load_mode(index)
+                else:
+                    index = faiss.read_index(VECTOR_STORE_PATH)
+            except Exception as e:
+                raise RuntimeError(f"Failed to load vector store {VECTOR_STORE_PATH}: {str(e)}")
+            apply_search_params(index)
+            build_direct_map(index)
+            return index
+        
+        # Trained index types start out flat until there is enough data to train on
+        if min_training_vectors(VECTOR_INDEX_TYPE) > 0:
+            return create_index(self.embedding_dim, "flat")
+        return create_index(self.embedding_dim, VECTOR_INDEX_TYPE)
+    
+    def _load_snapshot(self):
+        """(Re)load the on-disk snapshot, dropping any vectors held on top of the old one."""
+        self._index_read_only = False
+        self._index_load_mode = "memory"
+        self.index = self._load_or_create_index()
+        self._snapshot_id = file_identity(VECTOR_STORE_PATH)
         
-        return faiss.IndexFlatL2(self.embedding_dim)
+        # A memory-mapped snapshot is read-only, so new vectors go to an in-memory tail
+        self.tail_index = faiss.IndexFlatL2(self.embedding_dim) if VECTOR_MMAP else None
+    
+    def _sync_locked(self):
+        """
+        Catch up on snapshots and vectors written by other worker processes.
+
+        The caller holds the delta log lock and the index lock. Embedding ids are
+        positions, so every process must hold all vectors before allocating new ids.
+        """
+        if file_identity(VECTOR_STORE_PATH) != self._snapshot_id:
+            # Another worker compacted: its snapshot holds everything logged before the reset
+            self._load_snapshot()
+        writable = self.tail_index if self.tail_index is not None else self.index
+        self.delta_log.replay_from(self._ntotal(), writable)
+    
+    def _refresh(self):
+        """Before searching, pick up vectors other workers appended; cheap when nothing changed."""
+        if (self.delta_log.records_on_disk() == len(self.delta_log)
+                and file_identity(VECTOR_STORE_PATH) == self._snapshot_id):
+            return
+        with self.delta_log.lock(shared=True), self._index_lock.write():
+            self._sync_locked()
+    
+    def _maybe_migrate_index(self):
+        """Start a background rebuild if the index is not of the configured type yet."""
+        with self._index_lock.write():
+            if index_type_of(self.index) == VECTOR_INDEX_TYPE:
+                return
+            if self._ntotal() < max(1, min_training_vectors(VECTOR_INDEX_TYPE)):
+                return
+            if self._migration_thread and self._migration_thread.is_alive():
+                return
+            # Don't rebuild on every write after a failure; wait for more data first
+            if (self._migration_failed_at is not None
+                    and self._ntotal() < self._migration_failed_at * MIGRATION_RETRY_GROWTH):
+                return
+            
+            self._migration_thread = threading.Thread(
+                target=self._migrate_index,
+                name="faiss-index-migration",
+                daemon=True
+            )
+            self._migration_thread.start()
+    
+    def _migrate_index(self):
+        """Background migration target; failures leave the current index in place."""
+        with self._index_lock.read():
+            ntotal = self._ntotal()
+        try:
+            self.rebuild_index(VECTOR_INDEX_TYPE)
+            self._migration_failed_at = None
+        except Exception as e:
+            self._migration_failed_at = ntotal
+            self.index_report = {"error": f"Index migration failed at {ntotal} vectors: {str(e)}"}
+    
+    def rebuild_index(self, index_type: str = VECTOR_INDEX_TYPE, eval_queries: int = 100) -> Dict:
+        """Train and build a new index from the stored vectors, then swap it in."""
+        # Snapshot the vectors; writers may keep appending while we train
+        with self._index_lock.read():
+            snapshot_size = self._ntotal()
+            vectors = self._get_vectors(0, snapshot_size)
+        
+        new_index = build_index(vectors, index_type)
+        
+        # Catch up on vectors added during the build, by any worker, and swap atomically
+        with self.delta_log.lock(), self._index_lock.write():
+            self._sync_locked()
+            if self._ntotal() > snapshot_size:
+                new_index.add(self._get_vectors(snapshot_size, self._ntotal()))
+            self.index = new_index
+            self._index_read_only = False
+            self._index_load_mode = "memory"
+            if self.tail_index is not None:
+                self.tail_index = faiss.IndexFlatL2(self.embedding_dim)
+            self._compact_locked()
+        
+        # Report recall/latency of the new index on a sample of stored vectors
+        sample = vectors[np.random.choice(len(vectors), min(eval_queries, len(vectors)), replace=False)]
+        self.index_report = evaluate_index(new_index, vectors, sample)
+        return self.index_report
+    
+    def _ntotal(self) -> int:
+        """Total vectors across the snapshot index and the in-memory tail."""
+        tail_total = self.tail_index.ntotal if self.tail_index is not None else 0
+        return self.index.ntotal + tail_total
+    
+    def _get_vectors(self, start: int, end: int) -> np.ndarray:
+        """Reconstruct vectors by embedding id across the snapshot index and the tail."""
+        base_total = self.index.ntotal
+        parts = []
+        if start < base_total:
+            parts.append(get_vectors(self.index, start, min(end, base_total)))
+        if end > base_total:
+            parts.append(get_vectors(self.tail_index, max(start - base_total, 0), end - base_total))
+        if not parts:
+            return np.empty((0, self.embedding_dim), dtype=np.float32)
+        return np.vstack(parts)
+    
+    def _get_vectors_by_id(self, ids: np.ndarray) -> np.ndarray:
+        """Reconstruct vectors for arbitrary embedding ids across the snapshot index and the tail."""
+        base_total = self.index.ntotal
+        vectors = np.empty((len(ids), self.embedding_dim), dtype=np.float32)
+        in_base = ids < base_total
+        if in_base.any():
+            vectors[in_base] = get_vectors_by_id(self.index, ids[in_base])
+        if not in_base.all():
+            vectors[~in_base] = get_vectors_by_id(self.tail_index, ids[~in_base] - base_total)
+        return vectors
+    
+    def _index_add(self, vectors: np.ndarray):
+        """Add vectors to whichever index accepts writes."""
+        if self.tail_index is not None:
+            self.tail_index.add(vectors)
+        else:
+            self.index.add(vectors)
+    
+    def _index_search(self, query_embedding: np.ndarray, k: int):
+        """Search the snapshot index and the tail, returning ids in embedding_id space."""
+        # Held across the search so no add or compaction mutates the indexes underneath it
+        with self._index_lock.read():
+            base_total = self.index.ntotal
+            distances, indices = self.index.search(query_embedding, k)
+            if self.tail_index is None or self.tail_index.ntotal == 0:
+                return distances, indices
+            
+            tail_distances, tail_indices = self.tail_index.search(query_embedding, k)
+        return merge_search_results(distances, indices, tail_distances, tail_indices, base_total, k)
+    
+    def _scoped_search(self, query_embedding: np.ndarray, ids: np.ndarray, k: int):
+        """Search only the given embedding ids, returning up to k hits from that scope."""
+        empty = np.empty((1, 0), dtype=np.float32), np.empty((1, 0), dtype=np.int64)
+        
+        # Small scopes (e.g. one note): exact search over just their vectors
+        if len(ids) <= SCOPED_EXACT_SEARCH_MAX:
+            with self._index_lock.read():
+                # Chunks another worker committed after our last refresh are not indexed here yet
+                ids = ids[ids < self._ntotal()]
+                k = min(k, len(ids))
+                if k == 0:
+                    return empty
+                vectors = self._get_vectors_by_id(ids)
+            distances, positions = faiss.knn(query_embedding, vectors, k)
+            return distances, ids[positions]
+        
+        # Large scopes: let the index skip everything outside the selector
+        with self._index_lock.read():
+            ids = ids[ids < self._ntotal()]
+            k = min(k, len(ids))
+            if k == 0:
+                return empty
+            
+            base_total = self.index.ntotal
+            base_ids = ids[ids < base_total]
+            distances, indices = self.index.search(
+                query_embedding, k, params=search_params(self.index, base_ids)
+            )
+            if self.tail_index is None or self.tail_index.ntotal == 0:
+                return distances, indices
+            
+            tail_ids = ids[ids >= base_total] - base_total
+            tail_distances, tail_indices = self.tail_index.search(
+                query_embedding, k, params=search_params(self.tail_index, tail_ids)
+            )
+        return merge_search_results(distances, indices, tail_distances, tail_indices, base_total, k)
+    
+    def compact_index(self):
+        """Snapshot the live index to disk and truncate the delta log."""
+        # Single writer across workers: replay their appends so the snapshot loses none
+        with self.delta_log.lock(), self._index_lock.write():
+            self._sync_locked()
+            self._compact_locked()
+    
+    def _compact_locked(self):
+        """Write the snapshot and reset the log; the caller holds both locks and has synced."""
+        index = self.index
+        if self.tail_index is not None and self.tail_index.ntotal:
+            # The mapped snapshot is read-only; merge into a private copy
+            if self._index_read_only:
+                index = faiss.read_index(VECTOR_STORE_PATH)
+            index.add(get_vectors(self.tail_index))
+        
+        write_index_atomic(index, VECTOR_STORE_PATH)
+        self.delta_log.reset()
+        self._snapshot_id = file_identity(VECTOR_STORE_PATH)
+        
+        if VECTOR_MMAP:
+            self.index = read_index_mmap(VECTOR_STORE_PATH)
+            apply_search_params(self.index)
+            build_direct_map(self.index)
+            self._index_read_only = True
+            self._index_load_mode = mmap_load_mode(self.index)
+            # Fresh object so in-flight searches keep a consistent tail
+            self.tail_index = faiss.IndexFlatL2(self.embedding_dim)
+        else:
+            self.index = index
+    
+    def index_stats(self) -> Dict:
+        """Describe the live index and the most recent rebuild report."""
+        with self._index_lock.read():
+            return {
+                "index_type": index_type_of(self.index),
+                "configured_type": VECTOR_INDEX_TYPE,
+                "ntotal": int(self._ntotal()),
+                "mmapped": self._index_load_mode == "mmap",
+                "load_mode": self._index_load_mode,
+                "delta_vectors": len(self.delta_log),
+                "is_trained": bool(self.index.is_trained),
+                "migrating": bool(self._migration_thread and self._migration_thread.is_alive()),
+                "last_report": self.index_report,
+                "embedding_cache": self.embedding_cache.stats()
+            }
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Return this thread's persistent SQLite connection."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = connect(DATABASE_PATH)
+        return conn
     
     def _init_database(self):
         """Initialize SQLite database with required tables."""
-        with sqlite3.connect(DATABASE_PATH) as conn:
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS notes (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    title TEXT,
-                    content TEXT NOT NULL,
-                    summary TEXT,
-                    audio_path TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-            
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS chunks (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    note_id INTEGER,
-                    content TEXT NOT NULL,
-                    embedding_id INTEGER,
-                    start_time REAL,
-                    end_time REAL,
-                    FOREIGN KEY (note_id) REFERENCES notes (id) ON DELETE CASCADE
-                )
-            """)
+        with self._connect() as conn:
+            init_schema(conn)
+    
+    def _chunk_spans(self, text: str) -> List[Tuple[str, int, int]]:
+        """Split text into overlapping chunks with their character spans."""
+        return chunk_spans(text, CHUNK_SIZE, CHUNK_OVERLAP)
     
     def _chunk_text(self, text: str) -> List[str]:
         """Split text into overlapping chunks."""
-        words = text.split()
-        chunks = []
+        return [chunk for chunk, _, _ in self._chunk_spans(text)]
+    
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        """Encode texts through the embedding cache."""
+        return self.embedding_cache.encode(
+            lambda batch: self.embedding_model.encode(batch, batch_size=EMBEDDING_BATCH_SIZE),
+            texts
+        )
+    
+    def _insert_note(self,
+                     conn: sqlite3.Connection,
+                     content: str,
+                     title: Optional[str] = None,
+                     summary: Optional[str] = None,
+                     audio_path: Optional[str] = None,
+                     tags: Optional[List[str]] = None) -> int:
+        """Insert a note row and its tags, returning the new note id."""
+        cursor = conn.execute(
+            """
+            INSERT INTO notes (title, content, summary, audio_path)
+            VALUES (?, ?, ?, ?)
+            """,
+            (title, content, summary, audio_path)
+        )
+        note_id = cursor.lastrowid
+        if tags:
+            conn.executemany(
+                "INSERT OR IGNORE INTO note_tags (note_id, tag) VALUES (?, ?)",
+                [(note_id, tag.lower()) for tag in tags]
+            )
+        return note_id
+    
+    def _chunk_rows(self,
+                    note_id: int,
+                    content: str,
+                    spans: List[Tuple[str, int, int]],
+                    first_id: int,
+                    segments: Optional[List[Dict]] = None) -> List[tuple]:
+        """Build chunk rows mapping each chunk to its embedding id, offsets and segment times."""
+        # Offset-to-time interval index over the segments, swept once against the chunks
+        if segments:
+            times = chunk_times(spans, segment_intervals(content, segments))
+        else:
+            times = [(None, None)] * len(spans)
         
-        for i in range(0, len(words), CHUNK_SIZE - CHUNK_OVERLAP):
-            chunk = " ".join(words[i:i + CHUNK_SIZE])
-            chunks.append(chunk)
+        return [
+            (note_id, chunk, embedding_id, start_time, end_time, char_start, char_end)
+            for (chunk, char_start, char_end), (start_time, end_time), embedding_id
+            in zip(spans, times, range(first_id, first_id + len(spans)))
+        ]
+    
+    def _insert_chunks(self, conn: sqlite3.Connection, rows: List[tuple]):
+        conn.executemany(
+            """
+            INSERT INTO chunks (note_id, content, embedding_id, start_time, end_time, char_start, char_end)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            """,
+            rows
+        )
+    
+    def _append_vectors(self, embeddings: np.ndarray) -> int:
+        """Log and index new vectors, returning the embedding id of the first one."""
+        # Ids are allocated under the cross-process lock after catching up on other workers
+        with self.delta_log.lock(), self._index_lock.write():
+            self._sync_locked()
+            first_id = self._ntotal()
+            self.delta_log.append(first_id, embeddings)
+            self._index_add(embeddings)
+        return first_id
+    
+    def _after_write(self):
+        """Snapshot and retrain housekeeping after vectors were appended."""
+        # Fold the delta log into a new snapshot once it grows large
+        if len(self.delta_log) >= VECTOR_COMPACT_THRESHOLD:
+            self.compact_index()
         
-        return chunks
+        # Enough data may now have arrived to train the configured index
+        self._maybe_migrate_index()
     
     def add_note(self, 
                  content: str,
                  title: Optional[str] = None,
                  summary: Optional[str] = None,
                  audio_path: Optional[str] = None,
-                 segments: Optional[List[Dict]] = None) -> int:
+                 segments: Optional[List[Dict]] = None,
+                 tags: Optional[List[str]] = None) -> int:
         """Add new note and its embeddings to the database."""
         try:
             # Insert note
-            with sqlite3.connect(DATABASE_PATH) as conn:
-                cursor = conn.execute(
-                    """
-                    INSERT INTO notes (title, content, summary, audio_path)
-                    VALUES (?, ?, ?, ?)
-                    """,
-                    (title, content, summary, audio_path)
-                )
-                note_id = cursor.lastrowid
+            with self._connect() as conn:
+                note_id = self._insert_note(conn, content, title, summary, audio_path, tags)
             
             # Process chunks and embeddings
-            chunks = self._chunk_text(content)
-            embeddings = self.embedding_model.encode(chunks)
+            spans = self._chunk_spans(content)
+            embeddings = self._encode([chunk for chunk, _, _ in spans])
             
             # Add to FAISS index
-            self.index.add(embeddings)
+            first_id = self._append_vectors(embeddings)
             
             # Save chunks and their mapping to embeddings
-            with sqlite3.connect(DATABASE_PATH) as conn:
-                for i, (chunk, embedding_id) in enumerate(zip(chunks, range(self.index.ntotal - len(chunks), self.index.ntotal))):
-                    # Find corresponding segment times if available
-                    start_time = None
-                    end_time = None
-                    if segments:
-                        # Simple matching based on content overlap
-                        for segment in segments:
-                            if segment["text"] in chunk:
-                                start_time = segment["start"]
-                                end_time = segment["end"]
-                                break
-                    
-                    conn.execute(
-                        """
-                        INSERT INTO chunks (note_id, content, embedding_id, start_time, end_time)
-                        VALUES (?, ?, ?, ?, ?)
-                        """,
-                        (note_id, chunk, embedding_id, start_time, end_time)
-                    )
+            with self._connect() as conn:
+                self._insert_chunks(conn, self._chunk_rows(note_id, content, spans, first_id, segments))
             
-            # Save updated index
-            faiss.write_index(self.index, VECTOR_STORE_PATH)
+            self._after_write()
             
             return note_id
         
         except Exception as e:
             raise RuntimeError(f"Failed to add note to database: {str(e)}")
     
-    def search(self, query: str, k: int = 3) -> List[Dict]:
-        """Search for relevant chunks using RAG."""
-        # Generate query embedding
-        query_embedding = self.embedding_model.encode([query])
+    def add_notes(self,
+                  notes: Iterable[Dict],
+                  batch_size: int = INGEST_BATCH_CHUNKS,
+                  workers: int = 1,
+                  progress: Optional[Callable[[Dict], None]] = None) -> Dict:
+        """
+        Bulk-ingest a stream of notes.
+        
+        Chunks from consecutive notes are pooled until batch_size is reached, encoded
+        together (across a pool of CPU processes when workers > 1), then written to FAISS
+        and to SQLite in a single transaction.
+        
+        Args:
+            notes: Iterable of dicts with "content" and optional "title", "summary",
+                "audio_path", "segments" and "tags"
+            batch_size: Number of chunks per encode/write batch
+            workers: Number of encoding processes
+            progress: Optional callback receiving running stats after each batch
+        
+        Returns:
+            Dictionary with note ids, chunk count, elapsed time and chunks/sec
+        """
+        pool = None
+        if workers > 1:
+            pool = self.embedding_model.start_multi_process_pool(["cpu"] * workers)
+            encode_fn = lambda batch: self.embedding_model.encode_multi_process(
+                batch, pool, batch_size=EMBEDDING_BATCH_SIZE
+            )
+        else:
+            encode_fn = lambda batch: self.embedding_model.encode(batch, batch_size=EMBEDDING_BATCH_SIZE)
+        
+        stats = {"note_ids": [], "chunks": 0, "seconds": 0.0, "chunks_per_sec": 0.0}
+        start = time.perf_counter()
+        
+        def flush(pending: List[tuple]):
+            texts = [chunk for _, spans in pending for chunk, _, _ in spans]
+            if texts:
+                first_id = self._append_vectors(self.embedding_cache.encode(encode_fn, texts))
+            else:
+                first_id = self._ntotal()
+            
+            with self._connect() as conn:
+                rows = []
+                for note, spans in pending:
+                    note_id = self._insert_note(
+                        conn,
+                        note["content"],
+                        note.get("title"),
+                        note.get("summary"),
+                        note.get("audio_path"),
+                        note.get("tags")
+                    )
+                    rows.extend(self._chunk_rows(note_id, note["content"], spans, first_id, note.get("segments")))
+                    first_id += len(spans)
+                    stats["note_ids"].append(note_id)
+                self._insert_chunks(conn, rows)
+            
+            self._after_write()
+            stats["chunks"] += len(texts)
+            stats["seconds"] = time.perf_counter() - start
+            stats["chunks_per_sec"] = stats["chunks"] / stats["seconds"] if stats["seconds"] else 0.0
+            if progress:
+                progress(stats)
+        
+        try:
+            pending = []
+            pending_chunks = 0
+            for note in notes:
+                spans = self._chunk_spans(note["content"])
+                pending.append((note, spans))
+                pending_chunks += len(spans)
+                if pending_chunks >= batch_size:
+                    flush(pending)
+                    pending = []
+                    pending_chunks = 0
+            if pending:
+                flush(pending)
+            return stats
+        
+        except Exception as e:
+            raise RuntimeError(f"Bulk ingestion failed after {len(stats['note_ids'])} notes: {str(e)}")
+        
+        finally:
+            if pool is not None:
+                self.embedding_model.stop_multi_process_pool(pool)
+    
+    def embed_query(self, query: str) -> np.ndarray:
+        """Embedding of a query string, as used by search."""
+        return self._encode([query])[0]
+    
+    def _dense_search(self,
+                      query_embedding: np.ndarray,
+                      k: int,
+                      note_id: Optional[int] = None,
+                      start_date: Optional[str] = None,
+                      end_date: Optional[str] = None,
+                      tags: Optional[List[str]] = None) -> List[Tuple[int, float]]:
+        """FAISS-ranked (embedding_id, score) pairs, restricted to the matching chunks when filters are given."""
+        self._refresh()
+        if note_id is not None or start_date or end_date or tags:
+            with self._connect() as conn:
+                scope = scope_embedding_ids(conn, note_id, start_date, end_date, tags)
+            distances, indices = self._scoped_search(query_embedding, scope, k)
+        else:
+            distances, indices = self._index_search(query_embedding, k)
+        
+        return [
+            (int(idx), float(1 / (1 + distance)))
+            for distance, idx in zip(distances[0], indices[0])
+            if idx >= 0
+        ]
+    
+    def search(self,
+               query: str,
+               k: int = 3,
+               note_id: Optional[int] = None,
+               start_date: Optional[str] = None,
+               end_date: Optional[str] = None,
+               tags: Optional[List[str]] = None,
+               query_embedding: Optional[np.ndarray] = None,
+               mode: Optional[str] = None) -> List[Dict]:
+        """
+        Search for relevant chunks using RAG, optionally scoped by note, date range or tags.
+        
+        mode is dense (FAISS), lexical (FTS5 BM25) or hybrid, which fuses both rankings
+        with reciprocal rank fusion; it defaults to RETRIEVAL_MODE. score is the hit's own
+        relevance and score_source names its scale: "dense" is 1 / (1 + L2 distance) in
+        (0, 1], "lexical" is negated BM25 (unbounded, higher is better). Hybrid results
+        prefer the dense score and are ordered by, and also carry, rrf_score.
+        """
+        mode = mode or RETRIEVAL_MODE
+        if mode not in RETRIEVAL_MODES:
+            raise ValueError(f"Unknown retrieval mode: {mode}. Options: {RETRIEVAL_MODES}")
+        candidates = max(k, HYBRID_CANDIDATES) if mode == "hybrid" else k
+        
+        ranked = []
+        fused = None
+        dense_ids = set()
+        if mode != "lexical":
+            # Generate query embedding unless the caller already has it
+            if query_embedding is None:
+                query_embedding = self.embed_query(query)
+            query_embedding = np.ascontiguousarray(query_embedding, dtype=np.float32).reshape(1, -1)
+            ranked = self._dense_search(query_embedding, candidates, note_id, start_date, end_date, tags)
+            dense_ids = {idx for idx, _ in ranked}
+        
+        if mode != "dense":
+            with self._connect() as conn:
+                lexical = lexical_search(conn, query, candidates, note_id, start_date, end_date, tags)
+            if mode == "hybrid":
+                fused = reciprocal_rank_fusion([[i for i, _ in ranked], [i for i, _ in lexical]], k)
+                # Report each hit's own relevance, preferring the dense score
+                relevance = {**dict(lexical), **dict(ranked)}
+                ranked = [(idx, relevance[idx]) for idx, _ in fused]
+                fused = dict(fused)
+            else:
+                ranked = lexical
         
-        # Search in FAISS
-        distances, indices = self.index.search(query_embedding, k)
+        # Fetch corresponding chunks in a single batched lookup
+        with self._connect() as conn:
+            chunks = fetch_chunks(conn, [idx for idx, _ in ranked])
         
-        # Fetch corresponding chunks
         results = []
-        with sqlite3.connect(DATABASE_PATH) as conn:
-            for i, idx in enumerate(indices[0]):
-                chunk = conn.execute(
-                    """
-                    SELECT c.*, n.title, n.audio_path
-                    FROM chunks c
-                    JOIN notes n ON c.note_id = n.id
-                    WHERE c.embedding_id = ?
-                    """,
-                    (int(idx),)
-                ).fetchone()
-                
-                if chunk:
-                    results.append({
-                        "content": chunk[2],  # chunk content
-                        "note_id": chunk[1],
-                        "title": chunk[6],
-                        "audio_path": chunk[7],
-                        "start_time": chunk[4],
-                        "end_time": chunk[5],
-                        "score": float(1 / (1 + distances[0][i]))
-                    })
+        for idx, score in ranked:
+            chunk = chunks.get(idx)
+            if chunk:
+                result = {**chunk, "score": score, "score_source": "dense" if idx in dense_ids else "lexical"}
+                if fused is not None:
+                    result["rrf_score"] = fused[idx]
+                results.append(result)
         
         return results
     
     def get_note(self, note_id: int) -> Optional[Dict]:
         """Retrieve a specific note by ID."""
-        with sqlite3.connect(DATABASE_PATH) as conn:
+        with self._connect() as conn:
             note = conn.execute(
                 "SELECT * FROM notes WHERE id = ?",
                 (note_id,)
@@ -186,7 +851,7 @@ class RAGDatabase:
     
     def update_summary(self, note_id: int, summary: str):
         """Update the summary of a note."""
-        with sqlite3.connect(DATABASE_PATH) as conn:
+        with self._connect() as conn:
             conn.execute(
                 """
                 UPDATE notes 
@@ -0,0 +1,101 @@
+from typing import Callable, Dict, Iterable, Optional
+import resource
+import threading
+import time
+
+def _current_rss_bytes() -> int:
+    """Resident set size of this process, falling back to the peak where /proc is unavailable."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * resource.getpagesize()
+    except (OSError, ValueError, IndexError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+class ModelRegistry:
+    """Process-wide owner of heavy models, each loaded lazily and exactly once."""
+    
+    def __init__(self):
+        self._factories = {}
+        self._instances = {}
+        self._locks = {}
+        self._stats = {}
+    
+    def register(self, name: str, factory: Callable[[], object]):
+        """Register a zero-argument factory that builds the named resource."""
+        self._factories[name] = factory
+        self._locks[name] = threading.RLock()
+    
+    def get(self, name: str):
+        """Return the named resource, loading it on first use."""
+        if name in self._instances:
+            return self._instances[name]
+        if name not in self._factories:
+            raise KeyError(f"Unknown model: {name}. Registered: {list(self._factories)}")
+        
+        # Per-name locks let independent models load concurrently
+        with self._locks[name]:
+            if name not in self._instances:
+                rss_before = _current_rss_bytes()
+                start = time.perf_counter()
+                instance = self._factories[name]()
+                self._stats[name] = {
+                    # Both figures include dependencies loaded on first use
+                    "load_seconds": time.perf_counter() - start,
+                    "rss_delta_mb": (_current_rss_bytes() - rss_before) / (1024 * 1024)
+                }
+                self._instances[name] = instance
+        return self._instances[name]
+    
+    def is_loaded(self, name: str) -> bool:
+        return name in self._instances
+    
+    def warm_up(self, names: Optional[Iterable[str]] = None) -> Dict:
+        """Load the given models (all registered ones by default) and return their stats."""
+        names = list(names) if names else list(self._factories)
+        for name in names:
+            self.get(name)
+        return {name: self._stats[name] for name in names}
+    
+    def stats(self) -> Dict:
+        """Load state, load time and memory per registered model."""
+        return {
+            name: {"loaded": self.is_loaded(name), **self._stats.get(name, {})}
+            for name in self._factories
+        }
+
+def _load_embedding_model():
+    from sentence_transformers import SentenceTransformer
+    from ..utils.config import EMBEDDING_MODEL
+    return SentenceTransformer(EMBEDDING_MODEL)
+
+def _load_rag_database():
+    from .rag_database import RAGDatabase
+    return RAGDatabase(embedding_model=registry.get("embedding_model"))
+
+def _load_reranker():
+    from .reranker import Reranker
+    return Reranker()
+
+def _load_query_engine():
+    from .query_engine import QueryEngine
+    from ..utils.config import RERANK_ENABLED
+    return QueryEngine(
+        db=registry.get("rag_database"),
+        reranker=registry.get("reranker") if RERANK_ENABLED else None
+    )
+
+def _load_nlp_processor():
+    from .nlp_processing import NLPProcessor
+    return NLPProcessor(db=registry.get("rag_database"))
+
+def _load_whisper_transcriber():
+    from .whisper_model import WhisperTranscriber
+    return WhisperTranscriber()
+
+registry = ModelRegistry()
+registry.register("embedding_model", _load_embedding_model)
+registry.register("rag_database", _load_rag_database)
+registry.register("reranker", _load_reranker)
+registry.register("query_engine", _load_query_engine)
+registry.register("nlp_processor", _load_nlp_processor)
+registry.register("whisper_transcriber", _load_whisper_transcriber)
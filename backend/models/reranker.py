@@ -0,0 +1,103 @@
+from typing import Dict, List, Tuple
+import threading
+import time
+from sentence_transformers import CrossEncoder
+from ..utils.config import (
+    RERANK_MODEL,
+    RERANK_BATCH_SIZE,
+    RERANK_TIME_BUDGET,
+    CONTEXT_TOKEN_BUDGET
+)
+from ..utils.tokens import count_tokens
+
+class Reranker:
+    """Cross-encoder rescoring of retrieved chunks, within a prompt token budget and a time budget."""
+    
+    def __init__(self,
+                 model_name: str = RERANK_MODEL,
+                 batch_size: int = RERANK_BATCH_SIZE,
+                 time_budget: float = RERANK_TIME_BUDGET):
+        self.model = CrossEncoder(model_name)
+        self.batch_size = batch_size
+        self.time_budget = time_budget
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.fallbacks = 0
+        self.total_ms = 0.0
+    
+    def _score(self, query: str, chunks: List[Dict]) -> List[float]:
+        """Cross-encoder scores for the leading chunks that could be scored within the time budget."""
+        start = time.perf_counter()
+        scores = []
+        batch_cost = 0.0
+        for i in range(0, len(chunks), self.batch_size):
+            # A batch in flight can't be interrupted, so skip it if the last one says it won't fit
+            if scores and time.perf_counter() - start + batch_cost > self.time_budget:
+                break
+            batch_start = time.perf_counter()
+            batch = chunks[i:i + self.batch_size]
+            scores.extend(float(s) for s in self.model.predict(
+                [(query, chunk["content"]) for chunk in batch],
+                batch_size=self.batch_size
+            ))
+            batch_cost = time.perf_counter() - batch_start
+        return scores
+    
+    @staticmethod
+    def _fit_budget(chunks: List[Dict], top_n: int, token_budget: int) -> List[Dict]:
+        """Best chunks in order, up to top_n, skipping any that would overflow the token budget."""
+        selected = []
+        used = 0
+        for chunk in chunks:
+            if len(selected) >= top_n:
+                break
+            tokens = count_tokens(chunk["content"])
+            # Always keep the best chunk, even if it alone exceeds the budget
+            if selected and used + tokens > token_budget:
+                continue
+            selected.append(chunk)
+            used += tokens
+        return selected
+    
+    def rerank(self,
+               query: str,
+               chunks: List[Dict],
+               top_n: int,
+               token_budget: int = CONTEXT_TOKEN_BUDGET) -> Tuple[List[Dict], Dict]:
+        """
+        Reorder over-fetched chunks by cross-encoder score and keep the top_n that fit the budget.
+        
+        If the time budget runs out, the chunks scored so far are reordered and the
+        rest follow in retrieval order. Returns the kept chunks and a report.
+        """
+        start = time.perf_counter()
+        scores = self._score(query, chunks) if chunks else []
+        
+        scored = chunks[:len(scores)]
+        for chunk, score in zip(scored, scores):
+            chunk["rerank_score"] = score
+        ordered = sorted(scored, key=lambda chunk: chunk["rerank_score"], reverse=True) + chunks[len(scores):]
+        selected = self._fit_budget(ordered, top_n, token_budget)
+        
+        partial = len(scores) < len(chunks)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        with self._lock:
+            self.calls += 1
+            self.fallbacks += partial
+            self.total_ms += elapsed_ms
+        
+        return selected, {
+            "reranked": not partial,
+            "scored": len(scores),
+            "candidates": len(chunks),
+            "kept": len(selected),
+            "elapsed_ms": elapsed_ms
+        }
+    
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "fallbacks": self.fallbacks,
+                "latency_ms_mean": self.total_ms / self.calls if self.calls else 0.0
+            }
@@ -0,0 +1,279 @@
+from typing import Dict, Optional
+from contextlib import contextmanager
+import fcntl
+import os
+import time
+import faiss
+import numpy as np
+from ..utils.config import (
+    IVF_NLIST,
+    IVF_NPROBE,
+    IVF_PQ_M,
+    IVF_PQ_NBITS,
+    IVF_TRAIN_MIN_VECTORS,
+    HNSW_M,
+    HNSW_EF_CONSTRUCTION,
+    HNSW_EF_SEARCH
+)
+
+INDEX_TYPES = ("flat", "ivfpq", "hnsw")
+
+def create_index(dim: int, index_type: str) -> faiss.Index:
+    """Create an empty FAISS index of the given type (IVF indexes still need training)."""
+    if index_type == "flat":
+        return faiss.IndexFlatL2(dim)
+    if index_type == "ivfpq":
+        index = faiss.index_factory(dim, f"IVF{IVF_NLIST},PQ{IVF_PQ_M}x{IVF_PQ_NBITS}")
+    elif index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, HNSW_M)
+        index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+    else:
+        raise ValueError(f"Unknown vector index type: {index_type}. Options: {INDEX_TYPES}")
+
+    apply_search_params(index)
+    build_direct_map(index)
+    return index
+
+def index_type_of(index: faiss.Index) -> str:
+    """Return the configured type name matching an existing index."""
+    if isinstance(index, faiss.IndexHNSW):
+        return "hnsw"
+    if isinstance(index, faiss.IndexIVF):
+        return "ivfpq"
+    return "flat"
+
+def apply_search_params(index: faiss.Index):
+    """Apply query-time parameters, which are not reliably persisted with the index."""
+    if isinstance(index, faiss.IndexIVF):
+        index.nprobe = IVF_NPROBE
+    elif isinstance(index, faiss.IndexHNSW):
+        index.hnsw.efSearch = HNSW_EF_SEARCH
+
+def build_direct_map(index: faiss.Index):
+    """
+    Let an IVF index reconstruct vectors by id; later adds keep the map current.
+
+    Call it whenever an index is created or loaded, so read paths never modify a
+    shared index. A no-op for other index types and once the map exists.
+    """
+    if isinstance(index, faiss.IndexIVF):
+        index.make_direct_map()
+
+def min_training_vectors(index_type: str) -> int:
+    """Number of vectors needed before an index of this type can be built."""
+    return IVF_TRAIN_MIN_VECTORS if index_type == "ivfpq" else 0
+
+def get_vectors(index: faiss.Index, start: int = 0, end: Optional[int] = None) -> np.ndarray:
+    """Reconstruct stored vectors in positional order (lossy for PQ indexes; IVF needs build_direct_map)."""
+    end = index.ntotal if end is None else end
+    return index.reconstruct_n(start, end - start)
+
+def get_vectors_by_id(index: faiss.Index, ids: np.ndarray) -> np.ndarray:
+    """Reconstruct the vectors stored under the given positional ids (IVF needs build_direct_map)."""
+    return index.reconstruct_batch(np.ascontiguousarray(ids, dtype=np.int64))
+
+def search_params(index: faiss.Index, ids: np.ndarray) -> faiss.SearchParameters:
+    """Search parameters restricting an index search to the given ids."""
+    selector = faiss.IDSelectorBatch(np.ascontiguousarray(ids, dtype=np.int64))
+    if isinstance(index, faiss.IndexIVF):
+        params = faiss.SearchParametersIVF(sel=selector, nprobe=IVF_NPROBE)
+    elif isinstance(index, faiss.IndexHNSW):
+        params = faiss.SearchParametersHNSW(sel=selector, efSearch=HNSW_EF_SEARCH)
+    else:
+        params = faiss.SearchParameters(sel=selector)
+    # The parameters only hold a raw pointer; keep the selector alive with them
+    params.selector_ref = selector
+    return params
+
+def build_index(vectors: np.ndarray, index_type: str) -> faiss.Index:
+    """Create, train and populate an index from an array of vectors."""
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    if len(vectors) < min_training_vectors(index_type):
+        raise ValueError(
+            f"{index_type} index needs at least {min_training_vectors(index_type)} vectors to train, got {len(vectors)}"
+        )
+
+    index = create_index(vectors.shape[1], index_type)
+    if not index.is_trained:
+        index.train(vectors)
+    index.add(vectors)
+    return index
+
+# Leading fourcc bytes of IVF index files; IO_FLAG_MMAP maps their inverted lists by itself
+_IVF_FOURCC_PREFIXES = (b"Iw", b"Iv")
+
+def _is_ivf_file(path: str) -> bool:
+    """Whether a saved index is an IVF index, read from its header without loading it."""
+    with open(path, "rb") as f:
+        return f.read(2) in _IVF_FOURCC_PREFIXES
+
+def read_index_mmap(path: str) -> faiss.Index:
+    """Open an index snapshot read-only and memory-mapped so workers share page cache."""
+    flags = faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY
+    # IO_FLAG_MMAP_IFC extends mmap to flat codes on FAISS builds that support it,
+    # but IVF snapshots fail to load with it set
+    if not _is_ivf_file(path):
+        flags |= getattr(faiss, "IO_FLAG_MMAP_IFC", 0)
+    return faiss.read_index(path, flags)
+
+def mmap_load_mode(index: faiss.Index) -> str:
+    """How read_index_mmap actually loaded an index: "mmap", or "memory" when its vectors were copied."""
+    # IVF inverted lists are mapped by IO_FLAG_MMAP; flat and HNSW codes only with IO_FLAG_MMAP_IFC
+    if isinstance(index, faiss.IndexIVF) or hasattr(faiss, "IO_FLAG_MMAP_IFC"):
+        return "mmap"
+    return "memory"
+
+def merge_search_results(distances: np.ndarray,
+                         indices: np.ndarray,
+                         tail_distances: np.ndarray,
+                         tail_indices: np.ndarray,
+                         tail_offset: int,
+                         k: int):
+    """Merge top-k results from a base index and a tail index whose ids start at tail_offset."""
+    tail_indices = np.where(tail_indices >= 0, tail_indices + tail_offset, -1)
+    all_distances = np.hstack([distances, tail_distances])
+    all_indices = np.hstack([indices, tail_indices])
+    
+    # Missing hits carry id -1; push them to the end
+    all_distances = np.where(all_indices >= 0, all_distances, np.inf)
+    order = np.argsort(all_distances, axis=1, kind="stable")[:, :k]
+    return (np.take_along_axis(all_distances, order, axis=1),
+            np.take_along_axis(all_indices, order, axis=1))
+
+def write_index_atomic(index: faiss.Index, path: str):
+    """Write an index snapshot to a temp file and rename it over the old one."""
+    tmp_path = f"{path}.tmp"
+    faiss.write_index(index, tmp_path)
+    with open(tmp_path, "rb") as f:
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+def file_identity(path: str) -> Optional[tuple]:
+    """Identify a file version, so a snapshot replaced by another process can be detected."""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+class VectorDeltaLog:
+    """
+    Append-only log of (embedding_id, vector) records not yet in the index snapshot.
+
+    The log and snapshot are shared by every worker process. Writers hold lock() while
+    they allocate ids, append and compact; readers that catch up on other workers'
+    records hold lock(shared=True).
+    """
+    
+    def __init__(self, path: str, dim: int):
+        self.path = path
+        self.lock_path = f"{path}.lock"
+        self.dtype = np.dtype([("id", "<i8"), ("vector", "<f4", (dim,))])
+        with self.lock():
+            self.count = self._recover()
+    
+    @contextmanager
+    def lock(self, shared: bool = False):
+        """Cross-process lock on the log; not re-entrant, even within one process."""
+        with open(self.lock_path, "a") as f:
+            fcntl.flock(f.fileno(), fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+    
+    def _recover(self) -> int:
+        """Drop a partially written trailing record left by a crash (caller holds the lock)."""
+        if not os.path.exists(self.path):
+            return 0
+        size = os.path.getsize(self.path)
+        count = size // self.dtype.itemsize
+        if size != count * self.dtype.itemsize:
+            with open(self.path, "r+b") as f:
+                f.truncate(count * self.dtype.itemsize)
+        return count
+    
+    def __len__(self) -> int:
+        return self.count
+    
+    def records_on_disk(self) -> int:
+        """Complete records currently in the file, including other processes' appends."""
+        try:
+            return os.path.getsize(self.path) // self.dtype.itemsize
+        except FileNotFoundError:
+            return 0
+    
+    def append(self, first_id: int, vectors: np.ndarray):
+        """Durably append vectors whose embedding ids start at first_id (caller holds the lock)."""
+        records = np.empty(len(vectors), dtype=self.dtype)
+        records["id"] = np.arange(first_id, first_id + len(vectors))
+        records["vector"] = vectors
+        with open(self.path, "ab") as f:
+            f.write(records.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        self.count = self.records_on_disk()
+    
+    def replay(self, index: faiss.Index) -> int:
+        """Add logged vectors the index does not hold yet; returns the number replayed."""
+        return self.replay_from(index.ntotal, index)
+    
+    def replay_from(self, first_id: int, index: faiss.Index) -> int:
+        """Add logged vectors with embedding ids from first_id onwards to the given index."""
+        self.count = self.records_on_disk()
+        if not self.count:
+            return 0
+        
+        # Ids in the log are contiguous; records below first_id are already indexed
+        logged_from = int(np.fromfile(self.path, dtype=self.dtype, count=1)["id"][0])
+        if logged_from > first_id:
+            raise RuntimeError(
+                f"Vector delta log starts at id {logged_from} but snapshot holds {first_id} vectors"
+            )
+        skip = first_id - logged_from
+        if skip >= self.count:
+            return 0
+        pending = np.fromfile(
+            self.path, dtype=self.dtype, count=self.count - skip, offset=skip * self.dtype.itemsize
+        )
+        index.add(np.ascontiguousarray(pending["vector"]))
+        return len(pending)
+    
+    def reset(self):
+        """Empty the log once its contents are part of a snapshot (caller holds the lock)."""
+        with open(self.path, "wb") as f:
+            os.fsync(f.fileno())
+        self.count = 0
+
+def evaluate_index(index: faiss.Index,
+                   vectors: np.ndarray,
+                   queries: np.ndarray,
+                   k: int = 10) -> Dict:
+    """Measure recall@k against exact search and per-query latency."""
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    queries = np.ascontiguousarray(queries, dtype=np.float32)
+    k = min(k, len(vectors))
+
+    # Exact ground truth from a brute-force scan
+    exact = faiss.IndexFlatL2(vectors.shape[1])
+    exact.add(vectors)
+    _, truth = exact.search(queries, k)
+
+    # Time queries one at a time, as the request path issues them
+    latencies = []
+    hits = 0
+    for i in range(len(queries)):
+        start = time.perf_counter()
+        _, found = index.search(queries[i:i + 1], k)
+        latencies.append((time.perf_counter() - start) * 1000)
+        hits += len(set(found[0].tolist()) & set(truth[i].tolist()))
+
+    latencies = np.array(latencies)
+    return {
+        "index_type": index_type_of(index),
+        "ntotal": int(index.ntotal),
+        "k": k,
+        "recall_at_k": hits / float(len(queries) * k) if len(queries) else 0.0,
+        "latency_ms_mean": float(latencies.mean()) if len(latencies) else 0.0,
+        "latency_ms_p99": float(np.percentile(latencies, 99)) if len(latencies) else 0.0
+    }
@@ -1,26 +1,106 @@
 import whisper
 import torch
-from typing import Dict, Optional
+from typing import Callable, Dict, List, Optional, Tuple
+from collections import deque
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import numpy as np
-from ..utils.config import WHISPER_MODEL
+from ..utils.config import (
+    WHISPER_QUALITY_TIERS,
+    WHISPER_DEFAULT_QUALITY,
+    WHISPER_INT8_CPU,
+    WHISPER_BATCHED_DECODE,
+    WHISPER_BATCH_SIZE,
+    WHISPER_DECODE_THREADS,
+    WHISPER_PREFETCH_FILES,
+    MAX_AUDIO_LENGTH,
+    SAMPLE_RATE,
+    AUDIO_PREPROCESS_ENGINE,
+    TRANSCRIPTION_CACHE_DIR,
+    TRANSCRIPTION_CACHE_MAX_MB
+)
 from ..utils.audio_processing import AudioProcessor
+from ..utils.result_cache import ResultCache, file_sha256
+from .chunking import attach_offsets
 
 class WhisperTranscriber:
-    def __init__(self):
-        # Load Whisper model
+    def __init__(self, int8: Optional[bool] = None):
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
+        # Quantized Linear layers only run on CPU
+        self.int8 = (WHISPER_INT8_CPU if int8 is None else int8) and self.device == "cpu"
+        
+        # Loaded models by size; tiers sharing a size share the model
+        self.models = {}
+        self._load_lock = threading.Lock()
+        
+        # Load the default tier up front so a bad configuration fails at startup
+        self.get_model()
+        
+        self.audio_processor = AudioProcessor()
+        self.result_cache = ResultCache(TRANSCRIPTION_CACHE_DIR, TRANSCRIPTION_CACHE_MAX_MB * 1024 * 1024)
+    
+    @staticmethod
+    def model_name(quality: Optional[str] = None) -> str:
+        """Whisper model size serving the given quality tier."""
+        quality = quality or WHISPER_DEFAULT_QUALITY
+        if quality not in WHISPER_QUALITY_TIERS:
+            raise ValueError(f"Unknown quality: {quality}. Options: {list(WHISPER_QUALITY_TIERS)}")
+        return WHISPER_QUALITY_TIERS[quality]
+    
+    def _load_model(self, name: str):
+        """Load one Whisper model size, quantized to int8 when configured."""
         try:
-            self.model = whisper.load_model(WHISPER_MODEL).to(self.device)
+            model = whisper.load_model(name).to(self.device)
         except Exception as e:
             raise RuntimeError(f"Failed to load Whisper model: {str(e)}")
         
-        self.audio_processor = AudioProcessor()
+        if self.int8:
+            # Whisper's Linear subclass only adds dtype casting, which fp32 on CPU does not need;
+            # treat it as a plain Linear so dynamic quantization recognises it
+            for module in model.modules():
+                if isinstance(module, torch.nn.Linear):
+                    module.__class__ = torch.nn.Linear
+            model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        return model
+    
+    def get_model(self, quality: Optional[str] = None):
+        """Return the model for a quality tier, loading it on first use."""
+        name = self.model_name(quality)
+        if name not in self.models:
+            with self._load_lock:
+                if name not in self.models:
+                    self.models[name] = self._load_model(name)
+        return self.models[name]
+    
+    @property
+    def model(self):
+        """Model for the default quality tier."""
+        return self.get_model()
+    
+    def _cache_key(self, audio_path: str, quality: Optional[str] = None, **options) -> str:
+        """Cache key from the audio content and every option that changes the transcript."""
+        options.update(model=self.model_name(quality), int8=self.int8, preprocess=AUDIO_PREPROCESS_ENGINE)
+        return self.result_cache.make_key(file_sha256(audio_path), options)
+    
+    @staticmethod
+    def _format_segment(segment: Dict, offset: float = 0.0) -> Dict:
+        """Convert a Whisper segment to the API shape, shifted by offset seconds."""
+        # Whisper reports avg_logprob rather than a confidence
+        confidence = segment.get("confidence", np.exp(segment.get("avg_logprob", 0.0)))
+        return {
+            "start": segment["start"] + offset,
+            "end": segment["end"] + offset,
+            "text": segment["text"].strip(),
+            "confidence": float(confidence)
+        }
     
     def transcribe_audio(self, 
                         audio_path: str,
                         language: Optional[str] = None,
                         task: str = "transcribe",
+                        stream: Optional[bool] = None,
+                        quality: Optional[str] = None,
                         **kwargs) -> Dict:
         """
         Transcribe audio file using Whisper model.
@@ -29,11 +109,40 @@ class WhisperTranscriber:
             audio_path: Path to audio file
             language: Optional language code (e.g., "en", "es")
             task: Either "transcribe" or "translate"
+            stream: Transcribe in bounded-memory windows; by default only for
+                recordings longer than MAX_AUDIO_LENGTH
+            quality: Model tier from WHISPER_QUALITY_TIERS (default WHISPER_DEFAULT_QUALITY)
             **kwargs: Additional arguments for whisper model
         
         Returns:
             Dictionary containing transcription results
         """
+        # Re-uploads of the same recording with the same options skip inference
+        key = self._cache_key(audio_path, quality, mode="file", language=language, task=task, stream=stream, **kwargs)
+        cached = self.result_cache.get(key)
+        if cached is not None:
+            return cached
+        
+        result = self._transcribe_uncached(
+            audio_path, language=language, task=task, stream=stream, quality=quality, **kwargs
+        )
+        self.result_cache.put(key, result)
+        return result
+    
+    def _transcribe_uncached(self,
+                             audio_path: str,
+                             language: Optional[str] = None,
+                             task: str = "transcribe",
+                             stream: Optional[bool] = None,
+                             quality: Optional[str] = None,
+                             **kwargs) -> Dict:
+        """Run Whisper on the file, bypassing the result cache."""
+        model = self.get_model(quality)
+        if stream is None:
+            stream = self.audio_processor.get_duration(audio_path) > MAX_AUDIO_LENGTH
+        if stream:
+            return self.transcribe_stream(audio_path, language=language, task=task, quality=quality, **kwargs)
+        
         try:
             # Process audio
             audio, sr = self.audio_processor.process_audio_file(
@@ -50,24 +159,17 @@ class WhisperTranscriber:
             }
             
             # Run transcription
-            result = self.model.transcribe(
+            result = model.transcribe(
                 audio,
                 **{k: v for k, v in options.items() if v is not None}
             )
             
             # Extract segments with timestamps
-            segments = []
-            for segment in result["segments"]:
-                segments.append({
-                    "start": segment["start"],
-                    "end": segment["end"],
-                    "text": segment["text"].strip(),
-                    "confidence": float(segment["confidence"])
-                })
+            segments = [self._format_segment(segment) for segment in result["segments"]]
             
-            # Prepare response
+            # Prepare response; segments record their character offsets into the text
             response = {
-                "text": result["text"].strip(),
+                "text": attach_offsets(segments, result["text"].strip()),
                 "segments": segments,
                 "language": result["language"],
                 "duration": len(audio) / sr
@@ -78,14 +180,76 @@ class WhisperTranscriber:
         except Exception as e:
             raise RuntimeError(f"Transcription failed: {str(e)}")
     
+    def transcribe_stream(self,
+                          audio_path: str,
+                          language: Optional[str] = None,
+                          task: str = "transcribe",
+                          reduce_noise: bool = True,
+                          quality: Optional[str] = None,
+                          **kwargs) -> Dict:
+        """
+        Transcribe a recording of any length in overlapping, silence-aligned windows.
+        
+        Segments carry global timestamps. Segments from a window's overlap with the
+        previous one are dropped when their midpoint falls before the previous cut.
+        Silence is not removed, since that would shift timestamps.
+        """
+        model = self.get_model(quality)
+        try:
+            options = {k: v for k, v in {"task": task, "language": language, **kwargs}.items() if v is not None}
+            segments = []
+            # Whisper's unstripped segment texts, which carry its own word spacing
+            texts = []
+            duration = 0.0
+            
+            for window, offset, commit_from in self.audio_processor.stream_windows(audio_path):
+                audio = self.audio_processor.prepare_window(window, reduce_noise=reduce_noise)
+                result = model.transcribe(audio, **options)
+                
+                # Pin the language detected on the first window so later windows stay consistent
+                options.setdefault("language", result["language"])
+                
+                for segment in result["segments"]:
+                    formatted = self._format_segment(segment, offset)
+                    if (formatted["start"] + formatted["end"]) / 2 >= commit_from:
+                        segments.append(formatted)
+                        texts.append(segment["text"])
+                
+                # Carry recent text across the window boundary as decoding context
+                if segments and "initial_prompt" not in kwargs:
+                    options["initial_prompt"] = " ".join(s["text"] for s in segments[-3:])
+                
+                duration = offset + len(window) / SAMPLE_RATE
+            
+            return {
+                "text": attach_offsets(segments, "".join(texts).strip()),
+                "segments": segments,
+                "language": options.get("language"),
+                "duration": duration
+            }
+            
+        except Exception as e:
+            raise RuntimeError(f"Streaming transcription failed: {str(e)}")
+    
     def transcribe_batch(self, 
                         audio_paths: list,
+                        on_result: Optional[Callable[[Dict], None]] = None,
+                        batched: bool = WHISPER_BATCHED_DECODE,
+                        use_cache: bool = True,
                         **kwargs) -> list:
-        """Batch transcription of multiple audio files."""
+        """
+        Batch transcription of multiple audio files; on_result is called after each file.
+        
+        use_cache=False bypasses the result cache in both directions, e.g. for benchmarks.
+        """
+        if batched:
+            return self._transcribe_batched(audio_paths, on_result=on_result, use_cache=use_cache, **kwargs)
+        
+        transcribe = self.transcribe_audio if use_cache else self._transcribe_uncached
         results = []
         for audio_path in audio_paths:
             try:
-                result = self.transcribe_audio(audio_path, **kwargs)
+                result = transcribe(audio_path, **kwargs)
                 results.append({
                     "path": audio_path,
                     "success": True,
@@ -97,6 +261,239 @@ class WhisperTranscriber:
                     "success": False,
                     "error": str(e)
                 })
+            if on_result:
+                on_result(results[-1])
+        return results
+    
+    def _load_for_batch(self, audio_path: str) -> Optional[np.ndarray]:
+        """Preprocess one file for batched decoding; returns None for files that need streaming."""
+        if self.audio_processor.get_duration(audio_path) > MAX_AUDIO_LENGTH:
+            return None
+        audio, _ = self.audio_processor.process_audio_file(
+            audio_path,
+            remove_silence=True,
+            reduce_noise=True
+        )
+        return audio
+    
+    def _split_windows(self, audio: np.ndarray, boundary_search: float = 3.0) -> List[Tuple[int, int]]:
+        """Cut audio into windows of at most 30 s, ending at quiet points where possible."""
+        search = int(boundary_search * SAMPLE_RATE)
+        windows = []
+        start = 0
+        while start < len(audio):
+            end = start + whisper.audio.N_SAMPLES
+            if end >= len(audio):
+                end = len(audio)
+            else:
+                end = self.audio_processor.find_quiet_boundary(audio, end - search, end)
+            windows.append((start, end))
+            start = end
+        return windows
+    
+    @staticmethod
+    def _parse_window(result,
+                      tokenizer,
+                      offset: float,
+                      duration: float,
+                      texts: Optional[List[str]] = None) -> List[Dict]:
+        """
+        Split a decoded window into timestamped segments using its timestamp tokens.
+        
+        The unstripped text of each segment is appended to texts when given.
+        """
+        confidence = float(np.exp(result.avg_logprob))
+        segments = []
+        start = None
+        text_tokens = []
+        
+        def emit(segment_start: float, segment_end: float):
+            raw_text = tokenizer.decode(text_tokens)
+            text = raw_text.strip()
+            if text:
+                if texts is not None:
+                    texts.append(raw_text)
+                segments.append({
+                    "start": offset + segment_start,
+                    "end": offset + min(segment_end, duration),
+                    "text": text,
+                    "confidence": confidence
+                })
+        
+        for token in result.tokens:
+            if token >= tokenizer.timestamp_begin:
+                time = (token - tokenizer.timestamp_begin) * 0.02
+                if start is None:
+                    start = time
+                else:
+                    emit(start, time)
+                    start = None
+                    text_tokens = []
+            else:
+                text_tokens.append(token)
+        
+        # Text left without a closing timestamp runs to the end of the window
+        if text_tokens:
+            emit(start or 0.0, duration)
+        return segments
+    
+    def _transcribe_batched(self,
+                            audio_paths: list,
+                            language: Optional[str] = None,
+                            task: str = "transcribe",
+                            on_result: Optional[Callable[[Dict], None]] = None,
+                            quality: Optional[str] = None,
+                            use_cache: bool = True,
+                            **kwargs) -> list:
+        """
+        Transcribe many files by packing their 30-second windows into shared decode batches.
+        
+        Audio is loaded and preprocessed on a thread pool ahead of inference. Files longer
+        than MAX_AUDIO_LENGTH go through the streaming path one at a time afterwards.
+        Windows are decoded greedily and independently: there is no temperature fallback,
+        no conditioning on earlier text and the language is detected per window, so this
+        is opt-in (WHISPER_BATCHED_DECODE) for throughput-bound bulk jobs.
+        """
+        model = self.get_model(quality)
+        decode_fields = whisper.DecodingOptions.__dataclass_fields__
+        options = whisper.DecodingOptions(
+            task=task,
+            language=language,
+            fp16=self.device == "cuda",
+            **{k: v for k, v in kwargs.items() if k in decode_fields and v is not None}
+        )
+        tokenizer = whisper.tokenizer.get_tokenizer(
+            model.is_multilingual,
+            num_languages=model.num_languages
+        )
+        
+        results = [None] * len(audio_paths)
+        files = {}
+        batch = []
+        long_files = []
+        keys = {}
+        to_decode = []
+        
+        def finish(index: int, entry: Dict):
+            results[index] = entry
+            if on_result:
+                on_result(entry)
+        
+        def complete(index: int):
+            state = files.pop(index)
+            if state["error"]:
+                finish(index, {"path": audio_paths[index], "success": False, "error": state["error"]})
+                return
+            result = {
+                "text": attach_offsets(state["segments"], "".join(state["texts"]).strip()),
+                "segments": state["segments"],
+                "language": state["language"] or language,
+                "duration": state["duration"]
+            }
+            if use_cache:
+                self.result_cache.put(keys[index], result)
+            finish(index, {"path": audio_paths[index], "success": True, "result": result})
+        
+        def decode_batch():
+            try:
+                decoded = whisper.decode(model, torch.stack([item[3] for item in batch]), options)
+                error = None
+            except Exception as e:
+                decoded = [None] * len(batch)
+                error = f"Transcription failed: {str(e)}"
+            
+            for (index, offset, duration, _), result in zip(batch, decoded):
+                state = files[index]
+                if error:
+                    state["error"] = error
+                else:
+                    state["segments"].extend(
+                        self._parse_window(result, tokenizer, offset, duration, state["texts"])
+                    )
+                    state["language"] = state["language"] or result.language
+                state["pending"] -= 1
+                if state["pending"] == 0:
+                    complete(index)
+            batch.clear()
+        
+        # Serve repeated recordings from the result cache
+        for index, audio_path in enumerate(audio_paths):
+            if not use_cache:
+                to_decode.append((index, audio_path))
+                continue
+            try:
+                keys[index] = self._cache_key(
+                    audio_path, quality, mode="batched", language=language, task=task, **kwargs
+                )
+            except Exception as e:
+                finish(index, {"path": audio_path, "success": False, "error": str(e)})
+                continue
+            cached = self.result_cache.get(keys[index])
+            if cached is not None:
+                finish(index, {"path": audio_path, "success": True, "result": cached})
+            else:
+                to_decode.append((index, audio_path))
+        
+        with ThreadPoolExecutor(max_workers=WHISPER_DECODE_THREADS) as pool:
+            # Keep a bounded number of files loading ahead of the model
+            queue = deque()
+            remaining = iter(to_decode)
+            
+            def prefetch():
+                while len(queue) < WHISPER_PREFETCH_FILES:
+                    item = next(remaining, None)
+                    if item is None:
+                        return
+                    queue.append((item[0], pool.submit(self._load_for_batch, item[1])))
+            
+            prefetch()
+            while queue:
+                index, future = queue.popleft()
+                prefetch()
+                try:
+                    audio = future.result()
+                except Exception as e:
+                    finish(index, {"path": audio_paths[index], "success": False, "error": str(e)})
+                    continue
+                if audio is None:
+                    long_files.append(index)
+                    continue
+                
+                windows = self._split_windows(audio)
+                files[index] = {
+                    "pending": len(windows),
+                    "segments": [],
+                    "texts": [],
+                    "language": None,
+                    "duration": len(audio) / SAMPLE_RATE,
+                    "error": None
+                }
+                if not windows:
+                    complete(index)
+                    continue
+                
+                for start, end in windows:
+                    mel = whisper.log_mel_spectrogram(
+                        whisper.pad_or_trim(torch.from_numpy(audio[start:end])),
+                        n_mels=model.dims.n_mels,
+                        device=self.device
+                    )
+                    batch.append((index, start / SAMPLE_RATE, (end - start) / SAMPLE_RATE, mel))
+                    if len(batch) >= WHISPER_BATCH_SIZE:
+                        decode_batch()
+            
+            if batch:
+                decode_batch()
+        
+        # Recordings too long to hold in memory keep their streaming path
+        for index in long_files:
+            try:
+                transcribe = self.transcribe_audio if use_cache else self._transcribe_uncached
+                result = transcribe(audio_paths[index], language=language, task=task, quality=quality, **kwargs)
+                finish(index, {"path": audio_paths[index], "success": True, "result": result})
+            except Exception as e:
+                finish(index, {"path": audio_paths[index], "success": False, "error": str(e)})
+        
         return results
     
     @staticmethod
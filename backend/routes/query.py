@@ -1,12 +1,32 @@
-from flask import Blueprint, request, jsonify
-from ..models.query_engine import QueryEngine
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+import json
+from ..models.registry import registry
 
 query_bp = Blueprint('query', __name__)
-query_engine = QueryEngine()
+
+def _no_context_room(query_engine, query: str, max_tokens: int):
+    """400 response when max_tokens leaves no room in the prompt for retrieved context, else None."""
+    if query_engine.context_budget(query, max_tokens) <= 0:
+        return jsonify({'error': f'max_tokens {max_tokens} leaves no room for context in the prompt'}), 400
+    return None
+
 
 @query_bp.route('/query', methods=['POST'])
 def process_query():
+    """
+    Answer a query from the stored notes.
+
+    Response: {"success": true, "result": {"answer", "sources", "context"}}. Each source
+    has chunk_id, chunk_ids, content, note_id, optional timestamp, and:
+      score         the chunk's own relevance, on the scale named by score_source
+      score_source  "dense": 1 / (1 + L2 distance), in (0, 1];
+                    "lexical": negated BM25, unbounded, higher is better
+      rrf_score     hybrid retrieval only: the fused rank score sources are ordered by
+    Scores from different sources are not comparable; sort on rrf_score when present.
+    The stream and citation routes return sources in the same shape.
+    """
     try:
+        query_engine = registry.get('query_engine')
         data = request.get_json()
         
         if not data or 'query' not in data:
@@ -15,12 +35,18 @@ def process_query():
         query = data['query']
         note_id = data.get('note_id')
         max_tokens = data.get('max_tokens', 150)
+        invalid = _no_context_room(query_engine, query, max_tokens)
+        if invalid:
+            return invalid
         
         # Process query
         result = query_engine.query(
             query=query,
             note_id=note_id,
-            max_tokens=max_tokens
+            max_tokens=max_tokens,
+            start_date=data.get('start_date'),
+            end_date=data.get('end_date'),
+            tags=data.get('tags')
         )
         
         return jsonify({
@@ -33,9 +59,65 @@ def process_query():
             'error': str(e)
         }), 500
 
+def _sse(event: str, data: dict) -> str:
+    """Format one server-sent event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@query_bp.route('/query/stream', methods=['POST'])
+def stream_query():
+    data = request.get_json()
+    if not data or 'query' not in data:
+        return jsonify({'error': 'No query provided'}), 400
+    
+    try:
+        query_engine = registry.get('query_engine')
+        max_tokens = data.get('max_tokens', 150)
+        invalid = _no_context_room(query_engine, data['query'], max_tokens)
+        if invalid:
+            return invalid
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    
+    def generate():
+        try:
+            # Sources are sent as soon as retrieval finishes, then tokens as they arrive
+            events = query_engine.query_stream(
+                query=data['query'],
+                note_id=data.get('note_id'),
+                max_tokens=max_tokens,
+                start_date=data.get('start_date'),
+                end_date=data.get('end_date'),
+                tags=data.get('tags')
+            )
+            for event, payload in events:
+                yield _sse(event, payload)
+        except Exception as e:
+            yield _sse('error', {'error': str(e)})
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        # Stop proxies from buffering the stream
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@query_bp.route('/query/metrics', methods=['GET'])
+def query_metrics():
+    try:
+        return jsonify({
+            'success': True,
+            'metrics': registry.get('query_engine').metrics()
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'error': str(e)
+        }), 500
+
 @query_bp.route('/query/with-citations', methods=['POST'])
 def query_with_citations():
     try:
+        query_engine = registry.get('query_engine')
         data = request.get_json()
         
         if not data or 'query' not in data:
@@ -43,11 +125,17 @@ def query_with_citations():
         
         query = data['query']
         note_id = data.get('note_id')
+        max_tokens = data.get('max_tokens', 200)
+        invalid = _no_context_room(query_engine, query, max_tokens)
+        if invalid:
+            return invalid
         
         # Get answer with citations
         result = query_engine.get_answer_with_citations(
             query=query,
-            note_id=note_id
+            note_id=note_id,
+            max_tokens=max_tokens,
+            mode=data.get('mode')
         )
         
         return jsonify({
@@ -63,6 +151,7 @@ def query_with_citations():
 @query_bp.route('/suggest-questions', methods=['POST'])
 def suggest_questions():
     try:
+        query_engine = registry.get('query_engine')
         data = request.get_json()
         
         if not data or 'query' not in data or 'answer' not in data or 'context' not in data:
@@ -83,4 +172,17 @@ def suggest_questions():
     except Exception as e:
         return jsonify({
             'error': str(e)
-        }), 500
\ No newline at end of file
+        }), 500
+
+@query_bp.route('/index/stats', methods=['GET'])
+def index_stats():
+    try:
+        return jsonify({
+            'success': True,
+            'stats': registry.get('rag_database').index_stats()
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'error': str(e)
+        }), 500
@@ -1,12 +1,12 @@
 from flask import Blueprint, request, jsonify
-from ..models.nlp_processing import NLPProcessor
+from ..models.registry import registry
 
 summarize_bp = Blueprint('summarize', __name__)
-nlp_processor = NLPProcessor()
 
 @summarize_bp.route('/summarize', methods=['POST'])
 def summarize_text():
     try:
+        nlp_processor = registry.get('nlp_processor')
         data = request.get_json()
         
         if not data or 'text' not in data:
@@ -39,6 +39,7 @@ def summarize_text():
 @summarize_bp.route('/analyze', methods=['POST'])
 def analyze_text():
     try:
+        nlp_processor = registry.get('nlp_processor')
         data = request.get_json()
         
         if not data or 'text' not in data:
@@ -46,18 +47,12 @@ def analyze_text():
         
         text = data['text']
         
-        # Perform various analyses
-        sentiment = nlp_processor.analyze_sentiment(text)
-        topics = nlp_processor.extract_topics(text)
-        tags = nlp_processor.generate_tags(text)
+        # Sentiment, topics and tags in one combined pass
+        result = nlp_processor.analyze(text)
         
         return jsonify({
             'success': True,
-            'result': {
-                'sentiment': sentiment,
-                'topics': topics,
-                'tags': tags
-            }
+            'result': result
         })
         
     except Exception as e:
@@ -1,11 +1,32 @@
 from flask import Blueprint, request, jsonify
 from werkzeug.utils import secure_filename
 import os
-from ..models.whisper_model import WhisperTranscriber
-from ..utils.config import Config, ALLOWED_EXTENSIONS
+import uuid
+from ..models.registry import registry
+from ..utils.config import (
+    Config,
+    ALLOWED_EXTENSIONS,
+    WHISPER_QUALITY_TIERS,
+    TRANSCRIBE_WORKERS,
+    TRANSCRIBE_MAX_PENDING,
+    JOB_RESULT_TTL
+)
+from ..utils.job_queue import JobQueue, QueueFull
 
 transcribe_bp = Blueprint('transcribe', __name__)
-transcriber = WhisperTranscriber()
+
+def _invalid_quality(quality):
+    """Error response for an unknown quality tier, or None when it is valid."""
+    if quality and quality not in WHISPER_QUALITY_TIERS:
+        return jsonify({'error': f'Invalid quality. Options: {list(WHISPER_QUALITY_TIERS)}'}), 400
+    return None
+
+
+transcription_jobs = JobQueue(
+    workers=TRANSCRIBE_WORKERS,
+    max_pending=TRANSCRIBE_MAX_PENDING,
+    result_ttl=JOB_RESULT_TTL
+)
 
 @transcribe_bp.route('/transcribe', methods=['POST'])
 def transcribe_audio():
@@ -20,6 +41,11 @@ def transcribe_audio():
         if not file.filename.lower().endswith(tuple(ALLOWED_EXTENSIONS)):
             return jsonify({'error': 'Invalid file format'}), 400
         
+        quality = request.form.get('quality')
+        invalid = _invalid_quality(quality)
+        if invalid:
+            return invalid
+        
         # Save the uploaded file
         filename = secure_filename(file.filename)
         filepath = os.path.join(Config.UPLOAD_FOLDER, filename)
@@ -28,12 +54,15 @@ def transcribe_audio():
         # Get additional parameters
         language = request.form.get('language')
         task = request.form.get('task', 'transcribe')
+        stream = request.form.get('stream')
         
-        # Perform transcription
-        result = transcriber.transcribe_audio(
+        # Perform transcription (long recordings are streamed automatically)
+        result = registry.get('whisper_transcriber').transcribe_audio(
             filepath,
             language=language,
-            task=task
+            task=task,
+            stream=None if stream is None else stream.lower() == 'true',
+            quality=quality
         )
         
         return jsonify({
@@ -67,6 +96,11 @@ def transcribe_batch():
         filepaths = []
         results = []
         
+        quality = request.form.get('quality')
+        invalid = _invalid_quality(quality)
+        if invalid:
+            return invalid
+        
         # Save all files
         for file in files:
             if file.filename and file.filename.lower().endswith(tuple(ALLOWED_EXTENSIONS)):
@@ -77,10 +111,11 @@ def transcribe_batch():
         
         # Perform batch transcription
         if filepaths:
-            results = transcriber.transcribe_batch(
+            results = registry.get('whisper_transcriber').transcribe_batch(
                 filepaths,
                 language=request.form.get('language'),
-                task=request.form.get('task', 'transcribe')
+                task=request.form.get('task', 'transcribe'),
+                quality=quality
             )
         
         return jsonify({
@@ -99,4 +134,107 @@ def transcribe_batch():
             try:
                 os.remove(filepath)
             except:
-                pass
\ No newline at end of file
+                pass
+
+@transcribe_bp.route('/transcribe/jobs', methods=['POST'])
+def create_transcription_job():
+    filepaths = []
+    try:
+        files = request.files.getlist('files[]') or request.files.getlist('file')
+        if not files:
+            return jsonify({'error': 'No files provided'}), 400
+        
+        quality = request.form.get('quality')
+        invalid = _invalid_quality(quality)
+        if invalid:
+            return invalid
+        
+        # Save all files under unique names; concurrent jobs may upload the same filename
+        for file in files:
+            if file.filename and file.filename.lower().endswith(tuple(ALLOWED_EXTENSIONS)):
+                filename = f"{uuid.uuid4().hex}_{secure_filename(file.filename)}"
+                filepath = os.path.join(Config.UPLOAD_FOLDER, filename)
+                file.save(filepath)
+                filepaths.append(filepath)
+        
+        if not filepaths:
+            return jsonify({'error': 'Invalid file format'}), 400
+        
+        language = request.form.get('language')
+        task = request.form.get('task', 'transcribe')
+        
+        def run(job):
+            return registry.get('whisper_transcriber').transcribe_batch(
+                filepaths,
+                on_result=lambda _: job.advance(),
+                language=language,
+                task=task,
+                quality=quality
+            )
+        
+        def cleanup(job):
+            for filepath in filepaths:
+                try:
+                    os.remove(filepath)
+                except OSError:
+                    pass
+        
+        job = transcription_jobs.submit(run, total_steps=len(filepaths), on_finish=cleanup)
+        
+        return jsonify({
+            'success': True,
+            'job_id': job.id
+        }), 202
+        
+    except Exception as e:
+        # The job never started, so its uploads are ours to clean up
+        for filepath in filepaths:
+            try:
+                os.remove(filepath)
+            except OSError:
+                pass
+        return jsonify({
+            'error': str(e)
+        }), 503 if isinstance(e, QueueFull) else 500
+
+@transcribe_bp.route('/transcribe/jobs', methods=['GET'])
+def transcription_job_metrics():
+    return jsonify({
+        'success': True,
+        'metrics': transcription_jobs.metrics()
+    })
+
+@transcribe_bp.route('/transcribe/cache', methods=['GET'])
+def transcription_cache_stats():
+    try:
+        return jsonify({
+            'success': True,
+            'stats': registry.get('whisper_transcriber').result_cache.stats()
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'error': str(e)
+        }), 500
+
+@transcribe_bp.route('/transcribe/jobs/<job_id>', methods=['GET'])
+def get_transcription_job(job_id):
+    job = transcription_jobs.get(job_id)
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    
+    return jsonify({
+        'success': True,
+        'job': job.to_dict()
+    })
+
+@transcribe_bp.route('/transcribe/jobs/<job_id>', methods=['DELETE'])
+def cancel_transcription_job(job_id):
+    job = transcription_jobs.cancel(job_id)
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    
+    return jsonify({
+        'success': True,
+        'job': job.to_dict()
+    })
@@ -1,9 +1,18 @@
+import subprocess
 import numpy as np
 import librosa
 import soundfile as sf
 from pathlib import Path
-from typing import Tuple, Optional
-from .config import SAMPLE_RATE, MAX_AUDIO_LENGTH, ALLOWED_EXTENSIONS
+from typing import Iterator, Tuple, Optional
+from .config import (
+    SAMPLE_RATE,
+    MAX_AUDIO_LENGTH,
+    ALLOWED_EXTENSIONS,
+    AUDIO_PREPROCESS_ENGINE,
+    STREAM_WINDOW_SECONDS,
+    STREAM_OVERLAP_SECONDS,
+    STREAM_BOUNDARY_SEARCH_SECONDS
+)
 
 class AudioProcessor:
     @staticmethod
@@ -80,6 +89,23 @@ class AudioProcessor:
                           remove_silence: bool = True,
                           reduce_noise: bool = True) -> Tuple[np.ndarray, int]:
         """Complete audio processing pipeline."""
+        if AUDIO_PREPROCESS_ENGINE == "legacy":
+            audio, sr = cls.process_audio_legacy(input_path, remove_silence, reduce_noise)
+        else:
+            audio, sr = cls.process_audio_fast(input_path, remove_silence, reduce_noise)
+        
+        # Save if output path provided
+        if output_path:
+            cls.save_processed_audio(audio, sr, output_path)
+        
+        return audio, sr
+    
+    @classmethod
+    def process_audio_legacy(cls,
+                             input_path: str,
+                             remove_silence: bool = True,
+                             reduce_noise: bool = True) -> Tuple[np.ndarray, int]:
+        """Original librosa pipeline: native-rate load, resample, then one copy per step."""
         # Validate file
         if not cls.is_valid_file(input_path):
             raise ValueError(f"Invalid file format. Allowed formats: {ALLOWED_EXTENSIONS}")
@@ -94,8 +120,222 @@ class AudioProcessor:
         if remove_silence:
             audio = cls.remove_silence(audio, sr)
         
-        # Save if output path provided
-        if output_path:
-            cls.save_processed_audio(audio, sr, output_path)
+        return audio, sr
+    
+    @classmethod
+    def process_audio_fast(cls,
+                           input_path: str,
+                           remove_silence: bool = True,
+                           reduce_noise: bool = True) -> Tuple[np.ndarray, int]:
+        """
+        Single-buffer pipeline: decode straight to 16 kHz mono, then normalize, gate
+        and trim silence in place. Peak memory is the int16 decode buffer plus one
+        float32 signal.
+        """
+        # Validate file
+        if not cls.is_valid_file(input_path):
+            raise ValueError(f"Invalid file format. Allowed formats: {ALLOWED_EXTENSIONS}")
+        
+        try:
+            audio = cls.decode_audio(input_path)
+        except Exception as e:
+            raise RuntimeError(f"Error processing audio file: {str(e)}")
+        
+        # Check duration
+        if len(audio) / SAMPLE_RATE > MAX_AUDIO_LENGTH:
+            raise ValueError(f"Audio length exceeds maximum duration of {MAX_AUDIO_LENGTH} seconds")
+        
+        # Peak-normalize in place (same result as librosa.util.normalize)
+        if len(audio):
+            peak = max(float(audio.max()), -float(audio.min()))
+            if peak > 0:
+                audio *= 1.0 / peak
+        
+        if reduce_noise:
+            cls.noise_gate_inplace(audio)
+        
+        if remove_silence:
+            audio = cls.trim_silence_inplace(audio)
+        
+        return audio, SAMPLE_RATE
+    
+    @staticmethod
+    def _ffmpeg_decode_cmd(file_path: str) -> list:
+        """ffmpeg command that writes 16 kHz mono s16le PCM to stdout."""
+        return [
+            "ffmpeg", "-nostdin", "-loglevel", "error",
+            "-i", file_path,
+            "-f", "s16le", "-ac", "1", "-ar", str(SAMPLE_RATE), "-"
+        ]
+    
+    @classmethod
+    def decode_audio(cls, file_path: str) -> np.ndarray:
+        """Decode a whole file to 16 kHz mono float32, reading PCM into a preallocated buffer."""
+        # Size the buffer from the header; grow geometrically if the estimate was short
+        try:
+            expected = int(cls.get_duration(file_path) * SAMPLE_RATE) + SAMPLE_RATE
+        except Exception:
+            expected = 60 * SAMPLE_RATE
+        pcm = np.empty(max(expected, SAMPLE_RATE), dtype=np.int16)
+        view = memoryview(pcm).cast("B")
+        filled = 0
+        
+        process = subprocess.Popen(cls._ffmpeg_decode_cmd(file_path), stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        try:
+            while True:
+                if filled == len(view):
+                    view.release()
+                    pcm = np.concatenate([pcm, np.empty_like(pcm)])
+                    view = memoryview(pcm).cast("B")
+                read = process.stdout.readinto(view[filled:])
+                if not read:
+                    break
+                filled += read
+            
+            if process.wait() != 0:
+                raise RuntimeError(f"Error decoding audio file: {process.stderr.read().decode(errors='ignore')}")
+        finally:
+            if process.poll() is None:
+                process.kill()
+                process.wait()
+            view.release()
+        
+        # One conversion pass into the float32 signal
+        samples = filled // 2
+        audio = np.empty(samples, dtype=np.float32)
+        np.multiply(pcm[:samples], 1.0 / 32768.0, out=audio, casting="unsafe")
+        return audio
+    
+    @staticmethod
+    def noise_gate_inplace(audio: np.ndarray, block_size: int = 65536) -> np.ndarray:
+        """Zero samples below twice the mean level of the first second, block by block."""
+        threshold = np.mean(np.abs(audio[:int(SAMPLE_RATE)])) * 2 if len(audio) else 0.0
         
-        return audio, sr
\ No newline at end of file
+        # Blockwise so the abs/mask scratch stays small regardless of length
+        for start in range(0, len(audio), block_size):
+            block = audio[start:start + block_size]
+            block[np.abs(block) < threshold] = 0
+        return audio
+    
+    @staticmethod
+    def trim_silence_inplace(audio: np.ndarray) -> np.ndarray:
+        """Remove silent intervals by compacting voiced audio to the front of the buffer."""
+        intervals = librosa.effects.split(
+            audio,
+            top_db=30,
+            frame_length=2048,
+            hop_length=512
+        )
+        
+        write = 0
+        for start, end in intervals:
+            length = end - start
+            if start != write:
+                audio[write:write + length] = audio[start:end]
+            write += length
+        return audio[:write]
+    
+    @staticmethod
+    def get_duration(file_path: str) -> float:
+        """Duration in seconds, read from the file header where possible."""
+        return librosa.get_duration(path=file_path)
+    
+    @staticmethod
+    def stream_audio(file_path: str, block_seconds: float = 30.0) -> Iterator[np.ndarray]:
+        """Decode audio to 16 kHz mono float32 blocks through an ffmpeg pipe."""
+        block_bytes = int(block_seconds * SAMPLE_RATE) * 2
+        process = subprocess.Popen(
+            AudioProcessor._ffmpeg_decode_cmd(file_path),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE
+        )
+        try:
+            while True:
+                data = process.stdout.read(block_bytes)
+                if not data:
+                    break
+                yield np.frombuffer(data[:len(data) // 2 * 2], dtype=np.int16).astype(np.float32) / 32768.0
+            
+            if process.wait() != 0:
+                raise RuntimeError(f"Error decoding audio file: {process.stderr.read().decode(errors='ignore')}")
+        finally:
+            if process.poll() is None:
+                process.kill()
+                process.wait()
+    
+    @staticmethod
+    def find_quiet_boundary(audio: np.ndarray, start: int, end: int, frame_length: int = 480) -> int:
+        """Sample index of the lowest-energy frame in audio[start:end] (a simple energy VAD)."""
+        region = audio[start:end]
+        num_frames = len(region) // frame_length
+        if num_frames == 0:
+            return end
+        frames = region[:num_frames * frame_length].reshape(num_frames, frame_length)
+        energy = np.einsum("ij,ij->i", frames, frames)
+        return start + int(np.argmin(energy)) * frame_length + frame_length // 2
+    
+    @classmethod
+    def stream_windows(cls,
+                       input_path: str,
+                       window_seconds: float = STREAM_WINDOW_SECONDS,
+                       overlap_seconds: float = STREAM_OVERLAP_SECONDS,
+                       boundary_search_seconds: float = STREAM_BOUNDARY_SEARCH_SECONDS
+                       ) -> Iterator[Tuple[np.ndarray, float, float]]:
+        """
+        Split a recording of any length into overlapping windows cut at quiet points.
+        
+        Memory stays bounded by one window plus one decode block.
+        
+        Yields:
+            (window audio, window start time, commit time) in seconds; content before
+            the commit time was already covered by the previous window's tail
+        """
+        if not cls.is_valid_file(input_path):
+            raise ValueError(f"Invalid file format. Allowed formats: {ALLOWED_EXTENSIONS}")
+        
+        window = int(window_seconds * SAMPLE_RATE)
+        overlap = int(overlap_seconds * SAMPLE_RATE)
+        search = int(boundary_search_seconds * SAMPLE_RATE)
+        if window <= overlap + search:
+            raise ValueError("Stream window must be longer than the overlap plus boundary search")
+        
+        blocks = cls.stream_audio(input_path)
+        buffer = np.empty(0, dtype=np.float32)
+        offset = 0  # Global sample index of buffer[0]
+        commit = 0
+        eof = False
+        
+        while True:
+            while len(buffer) < window and not eof:
+                block = next(blocks, None)
+                if block is None:
+                    eof = True
+                else:
+                    buffer = np.concatenate([buffer, block])
+            
+            if len(buffer) == 0:
+                return
+            
+            # Cut the window at the quietest point near its end
+            if eof and len(buffer) <= window:
+                cut = len(buffer)
+            else:
+                cut = cls.find_quiet_boundary(buffer, window - search, window)
+            
+            yield buffer[:cut], offset / SAMPLE_RATE, commit / SAMPLE_RATE
+            
+            if eof and cut >= len(buffer):
+                return
+            
+            # Start the next window slightly before the cut
+            commit = offset + cut
+            buffer = buffer[cut - overlap:].copy()
+            offset += cut - overlap
+    
+    @classmethod
+    def prepare_window(cls, audio: np.ndarray, reduce_noise: bool = True) -> np.ndarray:
+        """Normalize (and optionally gate) a streamed window without changing its length."""
+        audio = librosa.util.normalize(audio)
+        if reduce_noise:
+            audio = cls.apply_noise_reduction(audio)
+        return audio
@@ -11,30 +11,114 @@ BASE_DIR = Path(__file__).resolve().parent.parent.parent
 # Database configurations
 DATABASE_PATH = os.path.join(BASE_DIR, "database", "notes.db")
 VECTOR_STORE_PATH = os.path.join(BASE_DIR, "database", "vector_store.faiss")
+VECTOR_DELTA_PATH = VECTOR_STORE_PATH + ".delta"  # Append-only log of vectors not yet in the snapshot
+EMBEDDING_CACHE_PATH = os.path.join(BASE_DIR, "database", "embedding_cache.db")
+TRANSCRIPTION_CACHE_DIR = os.path.join(BASE_DIR, "database", "transcription_cache")
 
 # Model configurations
 WHISPER_MODEL = "base"  # Options: tiny, base, small, medium, large
+# Request-level quality tiers mapped to Whisper model sizes; each size loads on first use
+WHISPER_QUALITY_TIERS = {
+    "fast": os.getenv("WHISPER_FAST_MODEL", "tiny"),
+    "balanced": WHISPER_MODEL,
+    "accurate": os.getenv("WHISPER_ACCURATE_MODEL", "small")
+}
+WHISPER_DEFAULT_QUALITY = os.getenv("WHISPER_DEFAULT_QUALITY", "balanced")
+WHISPER_INT8_CPU = os.getenv("WHISPER_INT8_CPU", "False").lower() == "true"  # Dynamic int8 quantization when on CPU
+WHISPER_BATCHED_DECODE = os.getenv("WHISPER_BATCHED_DECODE", "False").lower() == "true"  # Pack windows from many files per forward pass; greedy, no temperature fallback
+WHISPER_BATCH_SIZE = int(os.getenv("WHISPER_BATCH_SIZE", "8"))  # 30-second windows per decode batch
+WHISPER_DECODE_THREADS = int(os.getenv("WHISPER_DECODE_THREADS", "2"))  # Audio loading threads ahead of inference
+WHISPER_PREFETCH_FILES = 4  # Files decoded ahead of the model, bounds memory
 EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
 LLM_MODEL = "gpt-3.5-turbo"  # Change as needed
+LLM_CONTEXT_WINDOW = int(os.getenv("LLM_CONTEXT_WINDOW", "4096"))  # Prompt plus completion tokens the model accepts
+SUMMARIZER_MODEL = "facebook/bart-large-cnn"
+CLASSIFIER_MODEL = "facebook/bart-large-mnli"
+SENTIMENT_MODEL = "distilbert-base-uncased-finetuned-sst-2-english"
+NLP_BACKEND = os.getenv("NLP_BACKEND", "torch")  # Options: torch, int8 (dynamic quantization), onnx
+ONNX_CACHE_DIR = os.path.join(BASE_DIR, "database", "onnx_models")  # Exported ONNX graphs, reused across runs
+# Comma-separated registry names to load at startup, e.g. "query_engine,whisper_transcriber"
+WARMUP_MODELS = [m.strip() for m in os.getenv("WARMUP_MODELS", "").split(",") if m.strip()]
 
 # API configurations
 API_HOST = os.getenv("API_HOST", "0.0.0.0")
 API_PORT = int(os.getenv("API_PORT", "5000"))
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+OPENAI_API_BASE = os.getenv("OPENAI_API_BASE")  # e.g. a local fake completion server for testing
 
 # Audio configurations
 ALLOWED_EXTENSIONS = {"wav", "mp3", "m4a", "ogg"}
 MAX_AUDIO_LENGTH = 600  # Maximum audio length in seconds
 SAMPLE_RATE = 16000
+AUDIO_PREPROCESS_ENGINE = os.getenv("AUDIO_PREPROCESS_ENGINE", "fast")  # Options: fast, legacy
+# Long recordings are decoded and transcribed in overlapping windows cut at quiet points
+STREAM_WINDOW_SECONDS = float(os.getenv("STREAM_WINDOW_SECONDS", "300"))
+STREAM_OVERLAP_SECONDS = float(os.getenv("STREAM_OVERLAP_SECONDS", "5"))
+STREAM_BOUNDARY_SEARCH_SECONDS = 10.0  # How far back from the window end to look for silence
+
+# Transcription result cache, keyed by audio content hash and decoding options
+TRANSCRIPTION_CACHE_MAX_MB = int(os.getenv("TRANSCRIPTION_CACHE_MAX_MB", "512"))
+
+# Transcription job configurations
+TRANSCRIBE_WORKERS = int(os.getenv("TRANSCRIBE_WORKERS", "1"))  # Concurrent Whisper jobs per process
+TRANSCRIBE_MAX_PENDING = int(os.getenv("TRANSCRIBE_MAX_PENDING", "100"))  # Queued + running jobs before rejecting
+JOB_RESULT_TTL = int(os.getenv("JOB_RESULT_TTL", "3600"))  # Seconds finished job results are kept
 
 # RAG configurations
 CHUNK_SIZE = 500
 CHUNK_OVERLAP = 50
 TOP_K_RESULTS = 3
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))  # Sentences per encoder forward pass
+INGEST_BATCH_CHUNKS = int(os.getenv("INGEST_BATCH_CHUNKS", "2048"))  # Chunks per bulk-ingest write
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "hybrid")  # Options: dense, lexical, hybrid
+HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "20"))  # Results taken from each ranker before fusion
+RRF_K = 60  # Reciprocal rank fusion constant; larger values flatten the rank weighting
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1500"))  # Max retrieved-context tokens per prompt
+
+# Rerank configurations
+RERANK_ENABLED = os.getenv("RERANK_ENABLED", "False").lower() == "true"
+RERANK_MODEL = os.getenv("RERANK_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+RERANK_CANDIDATES = int(os.getenv("RERANK_CANDIDATES", "20"))  # Chunks over-fetched from search for reranking
+RERANK_BATCH_SIZE = int(os.getenv("RERANK_BATCH_SIZE", "16"))  # Query-chunk pairs per cross-encoder forward pass
+RERANK_TIME_BUDGET = float(os.getenv("RERANK_TIME_BUDGET", "0.3"))  # Seconds of scoring; unscored chunks keep search order
+
+# Answer cache configurations
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.95"))  # Min cosine similarity to reuse an answer
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "1000"))  # 0 disables the cache
+ANSWER_CACHE_TTL = int(os.getenv("ANSWER_CACHE_TTL", "3600"))  # Seconds an answer stays valid
+CITATION_MODE = os.getenv("CITATION_MODE", "single")  # Options: single (one completion), two_pass
+
+# Vector index configurations
+VECTOR_INDEX_TYPE = os.getenv("VECTOR_INDEX_TYPE", "flat")  # Options: flat, ivfpq, hnsw
+IVF_NLIST = int(os.getenv("IVF_NLIST", "1024"))  # Number of coarse clusters
+IVF_NPROBE = int(os.getenv("IVF_NPROBE", "16"))  # Clusters visited per query
+IVF_PQ_M = int(os.getenv("IVF_PQ_M", "48"))  # Sub-quantizers, must divide the embedding dim
+IVF_PQ_NBITS = 8
+IVF_TRAIN_MIN_VECTORS = max(IVF_NLIST, 2 ** IVF_PQ_NBITS) * 39  # ~39 points per centroid, coarse and PQ quantizers
+HNSW_M = int(os.getenv("HNSW_M", "32"))
+HNSW_EF_CONSTRUCTION = int(os.getenv("HNSW_EF_CONSTRUCTION", "200"))
+HNSW_EF_SEARCH = int(os.getenv("HNSW_EF_SEARCH", "64"))
+SCOPED_EXACT_SEARCH_MAX = int(os.getenv("SCOPED_EXACT_SEARCH_MAX", "20000"))  # Larger scopes use an ID selector
+VECTOR_MMAP = os.getenv("VECTOR_MMAP", "False").lower() == "true"  # Share the index snapshot via page cache
+VECTOR_COMPACT_THRESHOLD = int(os.getenv("VECTOR_COMPACT_THRESHOLD", "10000"))  # Delta vectors before snapshotting
+
+# Embedding cache configurations
+EMBEDDING_CACHE_MEMORY_SIZE = int(os.getenv("EMBEDDING_CACHE_MEMORY_SIZE", "10000"))  # Vectors kept in the LRU tier
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "500000"))  # Vectors kept on disk
 
 # Summary configurations
 MAX_SUMMARY_LENGTH = 500
 MIN_SUMMARY_LENGTH = 100
+SUMMARY_CHUNK_TOKENS = int(os.getenv("SUMMARY_CHUNK_TOKENS", "1000"))  # Input tokens per map-step chunk
+SUMMARY_MAP_MAX_LENGTH = 150  # Token budget for each partial summary before reduction
+SUMMARY_MAP_MIN_LENGTH = 30
+SUMMARY_BATCH_SIZE = int(os.getenv("SUMMARY_BATCH_SIZE", "8"))  # Chunks per summarizer forward pass
+
+# Key-point extraction configurations
+KEY_POINT_SCORER = os.getenv("KEY_POINT_SCORER", "nli")  # Options: nli, embedding
+KEY_POINT_TIME_BUDGET = float(os.getenv("KEY_POINT_TIME_BUDGET", "5.0"))  # Seconds of NLI scoring before falling back
+KEY_POINT_BLOCK_SENTENCES = 32  # Sentences scored between early-stopping checks
+KEY_POINT_BATCH_SIZE = int(os.getenv("KEY_POINT_BATCH_SIZE", "64"))  # Sentence-label pairs per NLI forward pass
 
 class Config:
     # Flask configurations
@@ -49,7 +133,7 @@ class Config:
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     
     # Upload configurations
-    MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
+    MAX_CONTENT_LENGTH = int(os.getenv("MAX_UPLOAD_MB", "16")) * 1024 * 1024  # 16MB max file size by default
     UPLOAD_FOLDER = os.path.join(BASE_DIR, "uploads")
     
     @staticmethod
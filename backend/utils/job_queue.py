@@ -0,0 +1,143 @@
+from typing import Callable, Dict, Optional
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+import uuid
+
+class JobCancelled(Exception):
+    """Raised inside a job function when its job has been cancelled."""
+
+class QueueFull(RuntimeError):
+    """Raised by submit when the queue already holds max_pending jobs."""
+
+class Job:
+    """State of one background job, shared between the worker and status endpoints."""
+    
+    def __init__(self, total_steps: int = 1):
+        self.id = uuid.uuid4().hex
+        self.status = "queued"  # queued, running, succeeded, failed, cancelled
+        self.completed_steps = 0
+        self.total_steps = total_steps
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self._cancel_event = threading.Event()
+    
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel_event.is_set()
+    
+    def advance(self, steps: int = 1):
+        """Record progress; raises JobCancelled if cancellation was requested."""
+        self.completed_steps += steps
+        self.check_cancelled()
+    
+    def check_cancelled(self):
+        if self.cancelled:
+            raise JobCancelled()
+    
+    def to_dict(self) -> Dict:
+        data = {
+            "id": self.id,
+            "status": self.status,
+            "progress": {"completed": self.completed_steps, "total": self.total_steps},
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at
+        }
+        if self.started_at:
+            data["wait_seconds"] = self.started_at - self.created_at
+            data["run_seconds"] = (self.finished_at or time.time()) - self.started_at
+        if self.status == "succeeded":
+            data["result"] = self.result
+        if self.error:
+            data["error"] = self.error
+        return data
+
+class JobQueue:
+    """Bounded in-process job queue backed by a thread pool."""
+    
+    def __init__(self, workers: int = 1, max_pending: int = 100, result_ttl: float = 3600):
+        self.max_pending = max_pending
+        self.result_ttl = result_ttl
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job-worker")
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._totals = {"succeeded": 0, "failed": 0, "cancelled": 0, "wait_seconds": 0.0, "run_seconds": 0.0}
+    
+    def _pending_count(self) -> int:
+        return sum(1 for job in self._jobs.values() if job.status in ("queued", "running"))
+    
+    def _purge_expired(self):
+        """Forget finished jobs older than result_ttl."""
+        cutoff = time.time() - self.result_ttl
+        expired = [job_id for job_id, job in self._jobs.items() if job.finished_at and job.finished_at < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
+    
+    def submit(self,
+               fn: Callable[[Job], object],
+               total_steps: int = 1,
+               on_finish: Optional[Callable[[Job], None]] = None) -> Job:
+        """Queue fn(job) for execution; raises QueueFull if the queue is full."""
+        with self._lock:
+            self._purge_expired()
+            if self._pending_count() >= self.max_pending:
+                raise QueueFull(f"Job queue is full ({self.max_pending} pending jobs)")
+            job = Job(total_steps)
+            self._jobs[job.id] = job
+        
+        self._executor.submit(self._run, job, fn, on_finish)
+        return job
+    
+    def _run(self, job: Job, fn: Callable[[Job], object], on_finish: Optional[Callable[[Job], None]]):
+        try:
+            if not job.cancelled:
+                job.status = "running"
+                job.started_at = time.time()
+                job.result = fn(job)
+                job.status = "succeeded"
+        except JobCancelled:
+            pass
+        except Exception as e:
+            job.error = str(e)
+            job.status = "failed"
+        finally:
+            if job.cancelled and job.status != "succeeded":
+                job.status = "cancelled"
+            job.finished_at = time.time()
+            with self._lock:
+                self._totals[job.status] += 1
+                if job.started_at:
+                    self._totals["wait_seconds"] += job.started_at - job.created_at
+                    self._totals["run_seconds"] += job.finished_at - job.started_at
+            if on_finish:
+                on_finish(job)
+    
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+    
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """Request cancellation; queued jobs never start, running jobs stop at their next step."""
+        job = self.get(job_id)
+        if job and job.status in ("queued", "running"):
+            job._cancel_event.set()
+        return job
+    
+    def metrics(self) -> Dict:
+        """Queue depth, running jobs, outcome counts and mean wait/run times."""
+        with self._lock:
+            statuses = [job.status for job in self._jobs.values()]
+            started = self._totals["succeeded"] + self._totals["failed"] + self._totals["cancelled"]
+            return {
+                "queued": statuses.count("queued"),
+                "running": statuses.count("running"),
+                "succeeded": self._totals["succeeded"],
+                "failed": self._totals["failed"],
+                "cancelled": self._totals["cancelled"],
+                "mean_wait_seconds": self._totals["wait_seconds"] / started if started else 0.0,
+                "mean_run_seconds": self._totals["run_seconds"] / started if started else 0.0
+            }
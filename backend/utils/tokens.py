@@ -0,0 +1,21 @@
+from functools import lru_cache
+from .config import LLM_MODEL
+
+@lru_cache(maxsize=1)
+def _encoding():
+    """tiktoken encoding for the configured LLM, or None when tiktoken is not installed."""
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    try:
+        return tiktoken.encoding_for_model(LLM_MODEL)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+
+def count_tokens(text: str) -> int:
+    """Number of LLM tokens in text; estimated at four characters per token without tiktoken."""
+    encoding = _encoding()
+    if encoding is None:
+        return (len(text) + 3) // 4
+    return len(encoding.encode(text))
@@ -0,0 +1,29 @@
+import pytest
+
+pytest.importorskip("openai")
+pytest.importorskip("faiss")
+pytest.importorskip("sentence_transformers")
+
+from backend.models.query_engine import QueryEngine
+
+
+def _chunk(embedding_id, note_id):
+    return {"embedding_id": embedding_id, "note_id": note_id, "start_time": None, "end_time": None}
+
+
+def test_parse_citations_keeps_brackets_that_are_not_sources():
+    chunks = [_chunk(7, 1), _chunk(9, 2)]
+    answer, citations = QueryEngine._parse_citations("Revenue grew in [2024] per the notes [1].", chunks)
+
+    assert answer == "Revenue grew in [2024] per the notes."
+    assert len(citations) == 1
+    assert citations[0]["text"] == "Revenue grew in [2024] per the notes"
+    assert citations[0]["sources"][0]["chunk_id"] == 7
+
+
+def test_parse_citations_merges_adjacent_markers():
+    chunks = [_chunk(7, 1), _chunk(9, 2)]
+    answer, citations = QueryEngine._parse_citations("The launch moved to May [1][2].", chunks)
+
+    assert answer == "The launch moved to May."
+    assert [source["chunk_id"] for source in citations[0]["sources"]] == [7, 9]
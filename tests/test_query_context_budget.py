@@ -0,0 +1,100 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("flask")
+
+from flask import Flask
+from backend.routes import query as query_routes
+
+LONG_ANSWER = 100000
+
+
+class FakeQueryEngine:
+    """Leaves 1000 tokens minus max_tokens for context and records calls that reach it."""
+
+    def __init__(self):
+        self.calls = []
+
+    @staticmethod
+    def context_budget(query, max_tokens):
+        return 1000 - max_tokens
+
+    def query(self, **kwargs):
+        self.calls.append(kwargs)
+        return {"answer": "ok", "sources": []}
+
+    def query_stream(self, **kwargs):
+        self.calls.append(kwargs)
+        yield "done", {"answer": "ok"}
+
+    def get_answer_with_citations(self, **kwargs):
+        self.calls.append(kwargs)
+        return {"answer": "ok", "sources": []}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    engine = FakeQueryEngine()
+    monkeypatch.setattr(query_routes.registry, "get", lambda name: engine)
+
+    app = Flask(__name__)
+    app.register_blueprint(query_routes.query_bp, url_prefix="/api")
+    test_client = app.test_client()
+    test_client.engine = engine
+    return test_client
+
+
+@pytest.mark.parametrize("path", ["/api/query", "/api/query/stream", "/api/query/with-citations"])
+def test_rejects_max_tokens_that_leave_no_context(client, path):
+    response = client.post(path, json={"query": "What was decided?", "max_tokens": LONG_ANSWER})
+    assert response.status_code == 400
+    assert "max_tokens" in response.get_json()["error"]
+    assert client.engine.calls == []
+
+
+@pytest.mark.parametrize("path", ["/api/query", "/api/query/stream", "/api/query/with-citations"])
+def test_accepts_max_tokens_within_the_window(client, path):
+    response = client.post(path, json={"query": "What was decided?", "max_tokens": 200})
+    assert response.status_code == 200
+    response.get_data()
+    assert client.engine.calls[0]["max_tokens"] == 200
+
+
+class FakeDatabase:
+    def embed_query(self, query):
+        return np.ones(4, dtype=np.float32)
+
+    def search(self, query, k=3, **kwargs):
+        return [{
+            "embedding_id": 0,
+            "content": "The team agreed to ship on Friday. " * 50,
+            "note_id": 1,
+            "title": "Planning",
+            "audio_path": None,
+            "start_time": None,
+            "end_time": None,
+            "char_start": 0,
+            "char_end": 1750,
+            "score": 0.9
+        }]
+
+
+def test_engine_answers_without_llm_or_cache_when_nothing_fits(monkeypatch):
+    pytest.importorskip("openai")
+    pytest.importorskip("sentence_transformers")
+    from backend.models import query_engine as engine_module
+
+    def no_llm(**kwargs):
+        raise AssertionError("LLM called without context")
+
+    monkeypatch.setattr(engine_module.openai.ChatCompletion, "create", no_llm)
+    engine = engine_module.QueryEngine(db=FakeDatabase())
+    max_tokens = engine_module.LLM_CONTEXT_WINDOW
+
+    for result in (engine.query("What was decided?", max_tokens=max_tokens),
+                   engine.get_answer_with_citations("What was decided?", max_tokens=max_tokens)):
+        assert result["answer"] == engine_module.NO_RESULTS_ANSWER
+        assert result["sources"] == []
+    events = dict(engine.query_stream("What was decided?", max_tokens=max_tokens))
+    assert events["done"]["answer"] == engine_module.NO_RESULTS_ANSWER
+    assert engine.answer_cache.stats()["entries"] == 0
@@ -0,0 +1,79 @@
+import io
+import time
+import pytest
+
+pytest.importorskip("flask")
+
+from flask import Flask
+from backend.routes import transcribe
+from backend.utils.config import Config
+
+
+class FakeTranscriber:
+    """Records the options each batch was called with and returns one result per file."""
+
+    def __init__(self):
+        self.calls = []
+
+    def transcribe_batch(self, audio_paths, on_result=None, **kwargs):
+        self.calls.append(kwargs)
+        results = []
+        for path in audio_paths:
+            results.append({"path": path, "success": True, "result": {"text": "hello"}})
+            if on_result:
+                on_result(results[-1])
+        return results
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    transcriber = FakeTranscriber()
+    monkeypatch.setattr(Config, "UPLOAD_FOLDER", str(tmp_path))
+    monkeypatch.setattr(transcribe.registry, "get", lambda name: transcriber)
+
+    app = Flask(__name__)
+    app.register_blueprint(transcribe.transcribe_bp, url_prefix="/api")
+    test_client = app.test_client()
+    test_client.transcriber = transcriber
+    return test_client
+
+
+def _wait_for_job(client, job_id, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = client.get(f"/api/transcribe/jobs/{job_id}").get_json()["job"]
+        if job["status"] not in ("queued", "running"):
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"Job {job_id} did not finish within {timeout}s")
+
+
+def test_job_runs_to_completion_with_quality(client, tmp_path):
+    response = client.post(
+        "/api/transcribe/jobs",
+        data={"file": (io.BytesIO(b"RIFF"), "meeting.wav"), "quality": "fast"},
+        content_type="multipart/form-data"
+    )
+    assert response.status_code == 202
+
+    job = _wait_for_job(client, response.get_json()["job_id"])
+    assert job["status"] == "succeeded", job.get("error")
+    assert job["progress"] == {"completed": 1, "total": 1}
+    assert client.transcriber.calls[0]["quality"] == "fast"
+
+    # Uploads are removed by the job's finish hook, which runs just after the status flips
+    deadline = time.time() + 1.0
+    while list(tmp_path.iterdir()) and time.time() < deadline:
+        time.sleep(0.01)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_job_rejects_unknown_quality(client, tmp_path):
+    response = client.post(
+        "/api/transcribe/jobs",
+        data={"file": (io.BytesIO(b"RIFF"), "meeting.wav"), "quality": "ultra"},
+        content_type="multipart/form-data"
+    )
+    assert response.status_code == 400
+    assert client.transcriber.calls == []
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,166 @@
+import zlib
+import numpy as np
+import pytest
+
+faiss = pytest.importorskip("faiss")
+
+from backend.models import vector_index
+from backend.models.vector_index import (
+    build_index,
+    get_vectors,
+    get_vectors_by_id,
+    mmap_load_mode,
+    read_index_mmap,
+    write_index_atomic
+)
+
+DIM = 32
+
+
+class FakeEmbeddingModel:
+    """Deterministic pseudo-random embeddings, one per distinct text."""
+
+    def get_sentence_embedding_dimension(self):
+        return DIM
+
+    def encode(self, texts, batch_size=None):
+        return np.stack([
+            np.random.default_rng(zlib.crc32(text.encode())).random(DIM, dtype=np.float32)
+            for text in texts
+        ])
+
+
+def _vectors(n, seed=0):
+    return np.random.default_rng(seed).random((n, DIM), dtype=np.float32)
+
+
+@pytest.mark.parametrize("factory", ["Flat", "HNSW16", "IVF16,PQ8x4"])
+def test_mmap_snapshot_reopens(tmp_path, factory):
+    vectors = _vectors(1000)
+    index = faiss.index_factory(DIM, factory)
+    if not index.is_trained:
+        index.train(vectors)
+    index.add(vectors)
+    _, expected = index.search(vectors[:5], 3)
+
+    path = str(tmp_path / "index.faiss")
+    write_index_atomic(index, path)
+
+    # Each worker restart maps the same snapshot again
+    for _ in range(2):
+        mapped = read_index_mmap(path)
+        assert mapped.ntotal == len(vectors)
+        assert mmap_load_mode(mapped) == "mmap"
+        _, found = mapped.search(vectors[:5], 3)
+        assert found.tolist() == expected.tolist()
+
+
+@pytest.fixture
+def small_ivfpq(monkeypatch):
+    """IVF-PQ parameters small enough to train on a few hundred vectors."""
+    monkeypatch.setattr(vector_index, "IVF_NLIST", 4)
+    monkeypatch.setattr(vector_index, "IVF_PQ_M", 8)
+    monkeypatch.setattr(vector_index, "IVF_PQ_NBITS", 4)
+    monkeypatch.setattr(vector_index, "IVF_TRAIN_MIN_VECTORS", max(4, 2 ** 4) * 39)
+
+
+def test_ivfpq_reconstructs_by_id_without_mutating_reads(small_ivfpq):
+    vectors = _vectors(700)
+    index = build_index(vectors, "ivfpq")
+    index.add(_vectors(10, seed=1))
+
+    # The direct map is built with the index and kept current by later adds
+    assert get_vectors_by_id(index, np.array([3, 705])).shape == (2, DIM)
+    assert get_vectors(index, 690, 710).shape == (20, DIM)
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    """The rag_database module, with every store file under tmp_path."""
+    pytest.importorskip("sentence_transformers")
+    from backend.models import rag_database
+
+    monkeypatch.setattr(rag_database, "DATABASE_PATH", str(tmp_path / "notes.db"))
+    monkeypatch.setattr(rag_database, "VECTOR_STORE_PATH", str(tmp_path / "index.faiss"))
+    monkeypatch.setattr(rag_database, "VECTOR_DELTA_PATH", str(tmp_path / "index.faiss.delta"))
+    monkeypatch.setattr(rag_database, "EMBEDDING_CACHE_PATH", str(tmp_path / "embedding_cache.db"))
+    return rag_database
+
+
+@pytest.fixture
+def ivfpq_mmap_store(store, monkeypatch, small_ivfpq):
+    monkeypatch.setattr(store, "VECTOR_MMAP", True)
+    monkeypatch.setattr(store, "VECTOR_INDEX_TYPE", "ivfpq")
+    return store
+
+
+def test_ivfpq_store_restarts_with_mmap(ivfpq_mmap_store):
+    model = FakeEmbeddingModel()
+    db = ivfpq_mmap_store.RAGDatabase(embedding_model=model)
+    min_vectors = vector_index.min_training_vectors("ivfpq")
+    db.add_notes({"content": f"Meeting note {i} about topic {i % 7}."} for i in range(min_vectors + 50))
+    if db._migration_thread:
+        db._migration_thread.join()
+    assert db.index_stats()["index_type"] == "ivfpq", db.index_stats()["last_report"]
+
+    # A restarted worker maps the IVF snapshot instead of failing to load it
+    restarted = ivfpq_mmap_store.RAGDatabase(embedding_model=model)
+    stats = restarted.index_stats()
+    assert stats["index_type"] == "ivfpq"
+    assert stats["load_mode"] == "mmap"
+    assert stats["ntotal"] == min_vectors + 50
+    assert restarted.search("Meeting note 3 about topic 3.", k=1, mode="dense")
+
+    # Scoped searches reconstruct vectors from the mapped IVF snapshot
+    scoped = restarted.search("Meeting note 3 about topic 3.", k=1, note_id=4, mode="dense")
+    assert [result["note_id"] for result in scoped] == [4]
+
+
+def test_failed_migration_waits_for_growth_before_retrying(ivfpq_mmap_store, monkeypatch):
+    attempts = []
+
+    def failing_build(vectors, index_type):
+        attempts.append(len(vectors))
+        raise RuntimeError("training failed")
+
+    monkeypatch.setattr(ivfpq_mmap_store, "build_index", failing_build)
+    db = ivfpq_mmap_store.RAGDatabase(embedding_model=FakeEmbeddingModel())
+
+    def add(start, count):
+        db.add_notes({"content": f"Note number {i}."} for i in range(start, start + count))
+        if db._migration_thread:
+            db._migration_thread.join()
+
+    min_vectors = vector_index.min_training_vectors("ivfpq")
+    add(0, min_vectors)
+    assert attempts == [min_vectors]
+    assert "training failed" in db.index_stats()["last_report"]["error"]
+
+    # Further writes don't restart the rebuild until the store has grown enough
+    for i in range(5):
+        db.add_note(f"Follow-up note {i}.")
+    assert len(attempts) == 1
+
+    add(min_vectors, min_vectors)
+    assert len(attempts) == 2
+    assert db.index_stats()["index_type"] == "flat"
+
+
+def test_hybrid_results_name_the_scale_of_their_score(store, monkeypatch):
+    # Few candidates per ranking, so some fused hits come from the lexical side only
+    monkeypatch.setattr(store, "HYBRID_CANDIDATES", 3)
+    db = store.RAGDatabase(embedding_model=FakeEmbeddingModel())
+    for i in range(20):
+        db.add_note(f"Weekly sync {i}: the Falcon-{i} rollout slipped a week.")
+
+    dense_ids = {r["embedding_id"] for r in db.search("Falcon-7", k=3, mode="dense")}
+    results = db.search("Falcon-7", k=3, mode="hybrid")
+    assert {r["score_source"] for r in results} == {"dense", "lexical"}
+    for result in results:
+        if result["embedding_id"] in dense_ids:
+            assert result["score_source"] == "dense"
+            assert 0 < result["score"] <= 1
+        else:
+            assert result["score_source"] == "lexical"
+    assert [r["rrf_score"] for r in results] == sorted((r["rrf_score"] for r in results), reverse=True)
+    assert all(r["score_source"] == "lexical" for r in db.search("Falcon-7", k=3, mode="lexical"))